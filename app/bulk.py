@@ -0,0 +1,186 @@
+import os
+from typing import Iterable, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Boolean, bindparam, func, literal_column, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .catalog import record_changes
+from .main import Category, Product
+
+# Largest request body the bulk endpoints accept, and rows per INSERT statement
+MAX_BULK_ROWS = int(os.getenv("MAX_BULK_ROWS", "5000"))
+BULK_CHUNK_SIZE = 1000
+
+
+def _insert_for(db: Session):
+    """Dialect insert() that supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise ValueError(f"Bulk upserts need PostgreSQL or SQLite, not {dialect}")
+
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def validate_rows(
+    rows: Iterable[dict], schema: type[BaseModel], key: str, start: int = 0
+) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Validate every row in one pass; returns (index, values) pairs and errors
+
+    A key repeated within the batch is an error for every occurrence after the
+    first, since one statement can't upsert the same row twice.
+    """
+    valid, errors = [], []
+    seen = set()
+    for index, raw in enumerate(rows, start):
+        try:
+            values = schema.model_validate(raw).model_dump()
+        except ValidationError as e:
+            errors.append(
+                {
+                    "index": index,
+                    "status": "error",
+                    "errors": e.errors(include_url=False, include_context=False),
+                }
+            )
+            continue
+        if values.get(key) is not None:
+            if values[key] in seen:
+                errors.append(
+                    {
+                        "index": index,
+                        "status": "error",
+                        "errors": [{"msg": f"Duplicate {key} in this batch"}],
+                    }
+                )
+                continue
+            seen.add(values[key])
+        valid.append((index, values))
+    return valid, errors
+
+
+def _upsert_keyed(db: Session, model, key_column, chunk) -> List[dict]:
+    """Multi-row INSERT ... ON CONFLICT (key) DO UPDATE RETURNING id, key
+
+    Rows come back in any order and are matched to their input by key: asking
+    for parameter order makes SQLAlchemy fall back to one INSERT per row.
+    """
+    stmt = _insert_for(db)(model)
+    updatable = {
+        name: stmt.excluded[name] for name in chunk[0][1] if name != key_column.key
+    }
+    # ON CONFLICT doesn't apply Python-side onupdate, so stamp it here
+    updatable["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(index_elements=[key_column], set_=updatable)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # xmax is only 0 on row versions this statement inserted
+        inserted = literal_column("xmax = 0", Boolean).label("inserted")
+        stmt = stmt.returning(model.id, key_column, inserted)
+        rows = db.execute(stmt, [values for _, values in chunk]).all()
+        returned = {row[1]: (row[0], row.inserted) for row in rows}
+    else:
+        keys = [values[key_column.key] for _, values in chunk]
+        existing = set(
+            db.execute(select(key_column).where(key_column.in_(keys))).scalars()
+        )
+        stmt = stmt.returning(model.id, key_column)
+        rows = db.execute(stmt, [values for _, values in chunk]).all()
+        returned = {row[1]: (row[0], row[1] not in existing) for row in rows}
+
+    results = []
+    for index, values in chunk:
+        row_id, inserted = returned[values[key_column.key]]
+        status = "created" if inserted else "updated"
+        results.append({"index": index, "status": status, "id": row_id})
+    return results
+
+
+def _insert_keyless(db: Session, model, chunk) -> List[dict]:
+    # Nothing to match on, so these need ids back in parameter order
+    stmt = _insert_for(db)(model).returning(model.id, sort_by_parameter_order=True)
+    ids = db.execute(stmt, [values for _, values in chunk]).scalars().all()
+    return [
+        {"index": index, "status": "created", "id": row_id}
+        for (index, _), row_id in zip(chunk, ids)
+    ]
+
+
+def _upsert(
+    db: Session, model, key_column, entity_type: str, items: List[Tuple[int, dict]]
+) -> List[dict]:
+    """Batched upserts by key_column; caller commits"""
+    results = []
+    for chunk in _chunks(items):
+        keyed = [item for item in chunk if item[1][key_column.key] is not None]
+        keyless = [item for item in chunk if item[1][key_column.key] is None]
+        chunk_results = []
+        if keyed:
+            chunk_results += _upsert_keyed(db, model, key_column, keyed)
+        if keyless:
+            chunk_results += _insert_keyless(db, model, keyless)
+        record_changes(
+            db.connection(),
+            entity_type,
+            [(result["id"], result["status"]) for result in chunk_results],
+        )
+        results += chunk_results
+    return results
+
+
+def upsert_products(db: Session, items: List[Tuple[int, dict]]) -> List[dict]:
+    """Products without a SKU can't be matched, so they are always inserted"""
+    return _upsert(db, Product, Product.sku, "product", items)
+
+
+def update_products_by_id(db: Session, items: List[Tuple[int, dict]]) -> List[dict]:
+    """One executemany UPDATE per chunk for rows matched on `id`; caller commits"""
+    results = []
+    for chunk in _chunks(items):
+        fields = [name for name in chunk[0][1] if name != "id"]
+        # Bind names can't repeat the SET columns' own names
+        stmt = (
+            update(Product.__table__)
+            .where(Product.id == bindparam("match_id"))
+            .values({name: bindparam(f"new_{name}") for name in fields})
+        )
+        db.connection().execute(
+            stmt,
+            [
+                {"match_id": values["id"], **{f"new_{n}": values[n] for n in fields}}
+                for _, values in chunk
+            ],
+        )
+        chunk_results = [
+            {"index": index, "status": "updated", "id": values["id"]}
+            for index, values in chunk
+        ]
+        record_changes(
+            db.connection(),
+            "product",
+            [(result["id"], "updated") for result in chunk_results],
+        )
+        results += chunk_results
+    return results
+
+
+def upsert_categories(db: Session, items: List[Tuple[int, dict]]) -> List[dict]:
+    return _upsert(db, Category, Category.name, "category", items)
+
+
+def bulk_summary(results: List[dict]) -> dict:
+    results = sorted(results, key=lambda result: result["index"])
+    return {
+        "created": sum(result["status"] == "created" for result in results),
+        "updated": sum(result["status"] == "updated" for result in results),
+        "errors": sum(result["status"] == "error" for result in results),
+        "results": results,
+    }
+
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and LRU eviction"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024, name: str = "default"):
+        self.name = name
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses.inc()
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._misses.inc()
+                return default
+            self._data.move_to_end(key)
+            self._hits.inc()
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class StaleWhileRevalidateCache:
+    """Async cache that serves stale entries while one background task refreshes
+
+    Entries younger than `soft_ttl` are fresh. Between `soft_ttl` and `hard_ttl`
+    callers get the stale value immediately and a single refresh runs in the
+    background. Missing or hard-expired keys are loaded inline, shared by all
+    concurrent callers. With `version`, an entry loaded under an older version
+    counts as stale.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        soft_ttl: float,
+        hard_ttl: float,
+        maxsize: int = 256,
+        version: Optional[Callable[[], Hashable]] = None,
+    ):
+        self.name = name
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self._version = version or (lambda: None)
+        self._entries = TTLCache(ttl=self.hard_ttl, maxsize=maxsize, name=name)
+        self._loading = {}
+
+    @property
+    def cache_control(self) -> str:
+        """Same policy for downstream proxies and browsers"""
+        return (
+            f"public, max-age={int(self.soft_ttl)}, "
+            f"stale-while-revalidate={int(self.hard_ttl - self.soft_ttl)}"
+        )
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at, version = entry
+            fresh = time.monotonic() - loaded_at < self.soft_ttl
+            if not (fresh and version == self._version()) and key not in self._loading:
+                self._start_load(key, load)
+            return value
+
+        task = self._loading.get(key) or self._start_load(key, load)
+        # Shielded so a disconnecting caller doesn't cancel everyone's load
+        return await asyncio.shield(task)
+
+    def _start_load(self, key: Hashable, load) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, load, self._version()))
+        task.add_done_callback(self._log_failure)
+        self._loading[key] = task
+        return task
+
+    async def _load(self, key: Hashable, load, version):
+        try:
+            value = await load()
+            self._entries.set(key, (value, time.monotonic(), version))
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    def _log_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Refreshing {self.name} cache failed: {task.exception()}")
+
+    def clear(self) -> None:
+        self._entries.clear()
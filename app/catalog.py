@@ -0,0 +1,135 @@
+import os
+import threading
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session, object_session
+
+from .cache import StaleWhileRevalidateCache
+from .changefeed import CATALOG_CHANGES_CHANNEL
+from .main import Category, Product
+from .models.catalog_event import CatalogEvent
+from .models.image import Image
+from .models.tombstone import Tombstone
+from .shared_cache import publish, subscribe
+
+# Bumped on every catalog write; caches include it in their keys so a write
+# makes older entries unreachable. Other workers hear about commits through
+# the shared cache's invalidation channel.
+_version = 0
+_version_lock = threading.Lock()
+
+
+def catalog_version() -> int:
+    return _version
+
+
+def bump_catalog_version():
+    global _version
+    with _version_lock:
+        _version += 1
+
+
+def notify_catalog_changed():
+    """For writes that bypass the ORM (bulk Core statements); call after commit"""
+    bump_catalog_version()
+    publish("catalog")
+
+
+subscribe("catalog", lambda key: bump_catalog_version())
+
+# Public catalog reads: fresh for the soft TTL, then served stale while one
+# refresh runs; never older than the hard TTL
+CATALOG_SOFT_TTL = float(os.getenv("CATALOG_SOFT_TTL", "15"))
+CATALOG_HARD_TTL = float(os.getenv("CATALOG_HARD_TTL", "120"))
+
+category_list_cache = StaleWhileRevalidateCache(
+    "categories", CATALOG_SOFT_TTL, CATALOG_HARD_TTL, version=catalog_version
+)
+product_list_cache = StaleWhileRevalidateCache(
+    "product_lists", CATALOG_SOFT_TTL, CATALOG_HARD_TTL, version=catalog_version
+)
+
+
+def record_changes(connection, entity_type: str, changes):
+    """Append (entity_id, action) pairs to the change feed, and tombstones for
+    deletions, inside the writer's transaction
+
+    One NOTIFY covers the batch and is only delivered if the transaction commits.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    connection.execute(
+        insert(CatalogEvent),
+        [
+            {"entity_type": entity_type, "entity_id": entity_id, "action": action}
+            for entity_id, action in changes
+        ],
+    )
+    deleted = [entity_id for entity_id, action in changes if action == "deleted"]
+    if deleted:
+        connection.execute(
+            insert(Tombstone),
+            [
+                {"entity_type": entity_type, "entity_id": entity_id}
+                for entity_id in deleted
+            ],
+        )
+    if connection.dialect.name == "postgresql":
+        connection.execute(select(func.pg_notify(CATALOG_CHANGES_CHANNEL, entity_type)))
+
+
+def record_change(connection, entity_type: str, entity_id: int, action: str):
+    record_changes(connection, entity_type, [(entity_id, action)])
+
+
+def delete_all(db: Session, model, entity_type: str) -> int:
+    """Bulk DELETE of every row, still recorded as deletions and tombstoned
+
+    Query.delete() skips the mapper events, so sync clients and SSE
+    subscribers would never hear about the rows going away.
+    """
+    ids = db.execute(delete(model).returning(model.id)).scalars().all()
+    record_changes(db.connection(), entity_type, [(i, "deleted") for i in ids])
+    if ids:
+        bump_catalog_version()
+        db.info["catalog_changed"] = True
+    return len(ids)
+
+
+def _catalog_listener(entity_type: str, action: str):
+    def catalog_changed(mapper, connection, target):
+        session = object_session(target)
+        # after_update also fires for objects that ended up with no net change
+        if action == "updated" and session is not None:
+            if not session.is_modified(target, include_collections=False):
+                return
+        bump_catalog_version()
+        if session is not None:
+            session.info["catalog_changed"] = True
+        record_change(connection, entity_type, target.id, action)
+
+    return catalog_changed
+
+
+_ENTITY_TYPES = ((Product, "product"), (Category, "category"), (Image, "image"))
+
+for _model, _entity_type in _ENTITY_TYPES:
+    for _event, _action in (
+        ("after_insert", "created"),
+        ("after_update", "updated"),
+        ("after_delete", "deleted"),
+    ):
+        event.listen(_model, _event, _catalog_listener(_entity_type, _action))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_catalog_change(session):
+    # Only once the data is visible, or other workers could re-cache old rows
+    if session.info.pop("catalog_changed", False):
+        publish("catalog")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_change(session):
+    session.info.pop("catalog_changed", None)
@@ -0,0 +1,203 @@
+import csv
+import itertools
+import json
+import os
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+
+from .bulk import update_products_by_id, upsert_products, validate_rows
+from .catalog import notify_catalog_changed
+from .database import SessionLocal
+from .main import Product, ProductCreate
+
+# Rows per validation chunk and per transaction; each batch commits on its own
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Report at most this many error rows and diffs, however large the feed
+MAX_REPORTED_ROWS = 100
+
+IMPORT_FORMATS = ("csv", "ndjson")
+PRODUCT_FIELDS = tuple(ProductCreate.model_fields)
+
+
+class ProductImportRow(ProductCreate):
+    # Exported rows carry the id, which matches products that have no SKU
+    id: Optional[int] = None
+
+
+def format_for(filename: str) -> Optional[str]:
+    suffix = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if suffix == "jsonl":
+        return "ndjson"
+    return suffix if suffix in IMPORT_FORMATS else None
+
+
+def parse_rows(lines: Iterable[str], format: str) -> Iterator:
+    """Lazily parse a feed into row dicts, one record at a time
+
+    CSV files exported from /api/products/export can be imported unchanged;
+    columns that aren't product fields are ignored.
+    """
+    if format == "csv":
+        for row in csv.DictReader(lines):
+            # An empty cell is a missing value, not an empty string
+            yield {key: value for key, value in row.items() if key and value != ""}
+    elif format == "ndjson":
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Validation reports it as an invalid row and the import goes on
+                yield line
+    else:
+        raise ValueError(f"Unsupported import format: {format}")
+
+
+def _plan(db, valid):
+    """Match rows to stored products; returns (planned, errors)
+
+    A row matches by SKU, else by `id`. A row that matches nothing creates a
+    product, unless it has only an `id`: that product is gone, which is an
+    error rather than something to recreate. planned holds (index, values, status, diff, matched_id) per row, where
+    matched_id is set for rows that matched on id alone.
+    """
+    columns = [Product.id] + [getattr(Product, field) for field in PRODUCT_FIELDS]
+    skus = [values["sku"] for _, values in valid if values["sku"]]
+    by_sku = {
+        row.sku: row
+        for row in db.execute(select(*columns).where(Product.sku.in_(skus)))
+    }
+    ids = [
+        values["id"]
+        for _, values in valid
+        if values["id"] is not None and values["sku"] not in by_sku
+    ]
+    by_id = {
+        row.id: row for row in db.execute(select(*columns).where(Product.id.in_(ids)))
+    }
+
+    planned, errors = [], []
+    for index, raw in valid:
+        values = {field: raw[field] for field in PRODUCT_FIELDS}
+        current = by_sku.get(values["sku"]) if values["sku"] else None
+        matched_id = None
+        if current is None and raw["id"] is not None:
+            current = by_id.get(raw["id"])
+            if current is not None:
+                matched_id = current.id
+            elif not values["sku"]:
+                errors.append(
+                    {
+                        "index": index,
+                        "status": "error",
+                        "errors": [{"msg": f"No product with id {raw['id']}"}],
+                    }
+                )
+                continue
+        if current is None:
+            planned.append((index, values, "created", None, None))
+            continue
+        diff = {
+            field: [getattr(current, field), values[field]]
+            for field in PRODUCT_FIELDS
+            if getattr(current, field) != values[field]
+        }
+        status = "updated" if diff else "unchanged"
+        planned.append((index, values, status, diff, matched_id))
+    return planned, errors
+
+
+class ImportReport:
+    def __init__(self, dry_run: bool, resume_from: int):
+        self.dry_run = dry_run
+        self.resume_from = resume_from
+        self.rows = resume_from
+        self.counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        self.error_rows = []
+        self.changes = []
+
+    def add(self, errors: list, planned: list):
+        self.counts["errors"] += len(errors)
+        self.error_rows.extend(errors[: MAX_REPORTED_ROWS - len(self.error_rows)])
+        for index, values, status, diff, _ in planned:
+            self.counts[status] += 1
+            if (
+                self.dry_run
+                and status != "unchanged"
+                and len(self.changes) < MAX_REPORTED_ROWS
+            ):
+                change = {"index": index, "status": status, "sku": values["sku"]}
+                change["changes"] = diff if diff else values
+                self.changes.append(change)
+
+    def as_dict(self) -> dict:
+        report = {
+            "dry_run": self.dry_run,
+            "resume_from": self.resume_from,
+            "rows": self.rows,
+            **self.counts,
+            "error_rows": self.error_rows,
+        }
+        if self.dry_run:
+            report["changes"] = self.changes
+        return report
+
+
+def import_products(
+    rows: Iterable,
+    dry_run: bool = False,
+    resume_from: int = 0,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_commit: Optional[Callable[[int], None]] = None,
+    session_factory=SessionLocal,
+) -> ImportReport:
+    """Upsert a stream of product rows, one short transaction per batch
+
+    Rows match stored products by SKU, or by `id` when the SKU matches none,
+    so an export re-imports without duplicates. Unchanged rows aren't
+    written. After each commit `on_commit` gets the number of input rows
+    handled so far; passing it back as `resume_from` continues an
+    interrupted import. A dry run writes nothing and reports what would
+    change instead.
+    """
+    report = ImportReport(dry_run, resume_from)
+    rows = itertools.islice(iter(rows), resume_from, None)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        valid, errors = validate_rows(
+            batch, ProductImportRow, "sku", start=report.rows
+        )
+
+        with session_factory() as db:
+            planned, unmatched = _plan(db, valid)
+            errors += unmatched
+            by_id = [
+                (index, {**values, "id": matched_id})
+                for index, values, status, _, matched_id in planned
+                if status == "updated" and matched_id is not None
+            ]
+            upserts = [
+                (index, values)
+                for index, values, status, _, matched_id in planned
+                if status != "unchanged" and matched_id is None
+            ]
+            pending = by_id or upserts
+            if pending and not dry_run:
+                if by_id:
+                    update_products_by_id(db, by_id)
+                if upserts:
+                    upsert_products(db, upserts)
+                db.commit()
+
+        report.add(errors, planned)
+        report.rows += len(batch)
+        if not dry_run:
+            if pending:
+                notify_catalog_changed()
+            if on_commit is not None:
+                on_commit(report.rows)
+    return report
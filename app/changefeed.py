@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import asyncpg
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import make_url
+
+from .database import DATABASE_URL, AsyncSessionLocal
+from .models.catalog_event import CatalogEvent
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANGES_CHANNEL = "catalog_changes"
+# Without LISTEN/NOTIFY (e.g. SQLite) the feed polls the event table this often
+CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "2"))
+# With LISTEN, still re-read the table now and then in case a NOTIFY was missed
+CHANGE_FEED_RESYNC_INTERVAL = 30.0
+# Events older than this are deleted; clients further behind must reload fully
+CATALOG_EVENT_RETENTION_HOURS = float(
+    os.getenv("CATALOG_EVENT_RETENTION_HOURS", "72")
+)
+# A skipped event id is re-checked this long in case its transaction is still
+# running; after that it's assumed rolled back (sequences never reuse values)
+CHANGE_FEED_GAP_TIMEOUT = float(os.getenv("CHANGE_FEED_GAP_TIMEOUT", "60"))
+MAX_TRACKED_GAPS = 10000
+CHANGE_FEED_BATCH = 1000
+CHANGE_FEED_QUEUE_SIZE = 1000
+CLEANUP_INTERVAL = 3600.0
+
+
+def event_payload(event: CatalogEvent) -> dict:
+    return {
+        "id": event.id,
+        "entity_type": event.entity_type,
+        "entity_id": event.entity_id,
+        "action": event.action,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+async def events_since(last_id: int, limit: int = CHANGE_FEED_BATCH) -> List[dict]:
+    # Always the primary: a lagging replica would make events look missing
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(CatalogEvent)
+            .where(CatalogEvent.id > last_id)
+            .order_by(CatalogEvent.id)
+            .limit(limit)
+        )
+        return [event_payload(event) for event in result.scalars()]
+
+
+async def events_with_ids(ids: List[int]) -> List[dict]:
+    events = []
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(ids), CHANGE_FEED_BATCH):
+            result = await db.execute(
+                select(CatalogEvent)
+                .where(CatalogEvent.id.in_(ids[start : start + CHANGE_FEED_BATCH]))
+                .order_by(CatalogEvent.id)
+            )
+            events.extend(event_payload(event) for event in result.scalars())
+    return events
+
+
+async def event_id_bounds():
+    """(oldest, newest) retained event ids, (None, None) when there are none"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(func.min(CatalogEvent.id), func.max(CatalogEvent.id))
+        )
+        return tuple(result.one())
+
+
+class Subscription:
+    """One SSE client's queue; a client that falls too far behind is cut off"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=CHANGE_FEED_QUEUE_SIZE)
+        self.overflowed = False
+
+    def push(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # It reconnects with Last-Event-ID and catches up from the table
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """Fans committed catalog events out to this worker's SSE clients
+
+    One LISTEN connection per worker wakes the feed, which then reads new rows
+    from catalog_events in id order; without Postgres it simply polls.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last_id: Optional[int] = None
+        # Ids below last_id not seen yet -> monotonic time the gap was noticed
+        self.gaps = {}
+        self.listening = False
+        self._task: Optional[asyncio.Task] = None
+        self._retention_task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._listener = None
+
+    def subscribe(self) -> Subscription:
+        # Started on first use so workers without SSE clients don't poll
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        subscription = Subscription()
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def start_retention(self):
+        """Delete expired events on a timer, whether or not anyone subscribes
+
+        Every write appends an event, so this can't wait for the first client.
+        """
+        if self._retention_task is None:
+            self._retention_task = asyncio.get_running_loop().create_task(
+                self._expire_events()
+            )
+
+    async def stop(self):
+        for task in (self._task, self._retention_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._retention_task = None
+        await self._close_listener()
+
+    async def _expire_events(self):
+        while True:
+            try:
+                await delete_expired_events()
+            except Exception as e:
+                logger.warning(f"Deleting expired catalog events failed: {e}")
+            await asyncio.sleep(CLEANUP_INTERVAL)
+
+    async def _listen(self):
+        if make_url(DATABASE_URL).get_backend_name() != "postgresql":
+            return
+        dsn = (
+            make_url(DATABASE_URL)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        try:
+            self._listener = await asyncpg.connect(dsn)
+            await self._listener.add_listener(
+                CATALOG_CHANGES_CHANNEL, lambda *args: self._wake.set()
+            )
+            self.listening = True
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning(f"Catalog LISTEN unavailable, polling instead: {e}")
+            await self._close_listener()
+
+    async def _close_listener(self):
+        self.listening = False
+        if self._listener is not None:
+            try:
+                await self._listener.close()
+            except (OSError, asyncpg.PostgresError):
+                pass
+            self._listener = None
+
+    async def _run(self):
+        while True:
+            if self._listener is not None and self._listener.is_closed():
+                await self._close_listener()
+            if self._listener is None:
+                await self._listen()
+
+            try:
+                if self.last_id is None:
+                    # Only events committed from now on are pushed live
+                    _, newest = await event_id_bounds()
+                    self.last_id = newest or 0
+                await self._dispatch_new_events()
+            except Exception as e:
+                logger.warning(f"Catalog change feed read failed: {e}")
+
+            timeout = (
+                CHANGE_FEED_RESYNC_INTERVAL
+                if self.listening
+                else CHANGE_FEED_POLL_INTERVAL
+            )
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _push(self, event: dict):
+        for subscription in list(self.subscribers):
+            subscription.push(event)
+
+    def _note_gap(self, after: int, before: int):
+        now = time.monotonic()
+        for missing in range(max(after + 1, before - MAX_TRACKED_GAPS), before):
+            self.gaps[missing] = now
+        # Oldest first, since dicts keep insertion order
+        for missing in list(self.gaps)[: max(0, len(self.gaps) - MAX_TRACKED_GAPS)]:
+            del self.gaps[missing]
+
+    async def _dispatch_late_events(self):
+        for event in await events_with_ids(list(self.gaps)):
+            del self.gaps[event["id"]]
+            self._push(event)
+        expired = time.monotonic() - CHANGE_FEED_GAP_TIMEOUT
+        self.gaps = {
+            missing: seen for missing, seen in self.gaps.items() if seen > expired
+        }
+
+    async def _dispatch_new_events(self):
+        # Ids are taken at insert time, not commit time, so an id skipped over
+        # may belong to a transaction that hasn't committed yet; gaps are
+        # re-read on every wake-up until they fill in or time out
+        if self.gaps:
+            await self._dispatch_late_events()
+        while True:
+            events = await events_since(self.last_id)
+            for event in events:
+                if event["id"] > self.last_id + 1:
+                    self._note_gap(self.last_id, event["id"])
+                self._push(event)
+                self.last_id = event["id"]
+            if len(events) < CHANGE_FEED_BATCH:
+                return
+
+
+async def delete_expired_events():
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=CATALOG_EVENT_RETENTION_HOURS
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(CatalogEvent).where(CatalogEvent.created_at < cutoff))
+        await db.commit()
+
+
+change_feed = ChangeFeed()
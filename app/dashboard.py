@@ -0,0 +1,118 @@
+import os
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .catalog import catalog_version
+from .main import Product
+from .models.image import Image
+from .pagination import ESTIMATED_COUNT_THRESHOLD, estimated_count
+
+# Dashboard numbers may lag writes by up to this many seconds
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+DASHBOARD_RECENT_PRODUCTS = 5
+
+dashboard_cache = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=1, name="dashboard")
+
+
+def _recent_products(db: Session) -> list:
+    """Most recently created or updated products, each side read with a LIMIT"""
+    columns = (
+        Product.id,
+        Product.name,
+        Product.price,
+        Product.category,
+        func.coalesce(Product.updated_at, Product.created_at).label("changed_at"),
+    )
+    created = db.execute(
+        select(*columns).order_by(Product.id.desc()).limit(DASHBOARD_RECENT_PRODUCTS)
+    ).all()
+    updated = db.execute(
+        select(*columns)
+        .where(Product.updated_at.isnot(None))
+        .order_by(Product.updated_at.desc())
+        .limit(DASHBOARD_RECENT_PRODUCTS)
+    ).all()
+
+    merged = {row.id: row._asdict() for row in created + updated}
+    return sorted(
+        merged.values(),
+        key=lambda row: (row["changed_at"] is not None, row["changed_at"], row["id"]),
+        reverse=True,
+    )[:DASHBOARD_RECENT_PRODUCTS]
+
+
+def _estimated_category_counts(db: Session, total: int) -> Optional[list]:
+    """Per-category counts from the planner's most-common-values statistics
+
+    Categories outside the most-common list are summed into one row with
+    `other` set, so the rows add up to the total.
+    """
+    stats = db.execute(
+        text(
+            "SELECT most_common_vals::text::text[] AS vals, most_common_freqs "
+            "AS freqs, null_frac FROM pg_stats WHERE schemaname = current_schema() "
+            "AND tablename = :table AND attname = 'category'"
+        ),
+        {"table": Product.__tablename__},
+    ).first()
+    if stats is None or stats.vals is None:
+        return None
+    counts = [
+        {"category": category, "count": round(freq * total)}
+        for category, freq in zip(stats.vals, stats.freqs)
+    ]
+    if stats.null_frac:
+        counts.append({"category": None, "count": round(stats.null_frac * total)})
+    counts.sort(key=lambda row: row["count"], reverse=True)
+    other = round((1 - sum(stats.freqs) - stats.null_frac) * total)
+    if other > 0:
+        counts.append({"category": None, "count": other, "other": True})
+    return counts
+
+
+def _category_counts(db: Session):
+    """(total, category counts, whether they're estimates)
+
+    Exact counts group every product row, so very large catalogs use planner
+    statistics instead, as the /admin/products total does.
+    """
+    estimate = estimated_count(db, Product.__tablename__)
+    if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+        counts = _estimated_category_counts(db, estimate)
+        if counts is not None:
+            return estimate, counts, True
+    rows = db.execute(
+        select(Product.category, func.count())
+        .group_by(Product.category)
+        .order_by(func.count().desc())
+    ).all()
+    counts = [{"category": category, "count": count} for category, count in rows]
+    return sum(count for _, count in rows), counts, False
+
+
+def dashboard_summary(db: Session) -> dict:
+    """Counts and recent products for /admin, independent of catalog size"""
+    key = ("summary", catalog_version())
+    summary = dashboard_cache.get(key)
+    if summary is not None:
+        return summary
+
+    products_count, category_counts, counts_are_estimates = _category_counts(db)
+    image_count = db.execute(
+        select(func.count())
+        .select_from(Image)
+        .where(Image.entity_type == "products", Image.is_active.is_(True))
+    ).scalar()
+
+    summary = {
+        "products_count": products_count,
+        "counts_are_estimates": counts_are_estimates,
+        "category_counts": category_counts,
+        "image_count": image_count,
+        "recent_products": _recent_products(db),
+    }
+    dashboard_cache.set(key, summary)
+    return summary
@@ -0,0 +1,121 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .metrics import IMAGE_MEMORY_IN_USE, IMAGE_PEAK_BYTES
+
+# Decoded-pixel memory all in-flight uploads on this worker may hold at once
+IMAGE_MEMORY_BUDGET_MB = int(os.getenv("IMAGE_MEMORY_BUDGET_MB", "256"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_ADMISSION_TIMEOUT = float(os.getenv("IMAGE_ADMISSION_TIMEOUT", "30"))
+
+
+def decoded_size(image: Image.Image) -> int:
+    """Bytes the pixel buffer takes once decoded (width x height x bands)"""
+    return image.width * image.height * len(image.getbands())
+
+
+def _pixel_bytes(mode: str) -> int:
+    # Pillow keeps 8-bit single-band pixels in 1 byte and pads the rest to 4
+    return 1 if mode in ("1", "L", "P") else 4
+
+
+def estimated_working_set(image: Image.Image) -> int:
+    """Peak bytes process_upload holds for this image, from the modes it passes
+    through in optimize_image and create_thumbnail
+    """
+    pixels = image.width * image.height
+    source = pixels * _pixel_bytes(image.mode)
+    total = source
+    if image.mode == "P":
+        total += pixels * 4  # RGBA conversion
+    if image.mode in ("RGBA", "LA", "P"):
+        total += pixels * 4  # split() materialises every band for the mask
+    total += pixels * 4  # RGB result (white canvas or convert())
+    total += pixels * 4  # exif_transpose copy
+    total += source  # ImageOps.fit crops the source before resizing
+    return total
+
+
+class PeakTracker:
+    """Largest total of decoded buffers alive at any checkpoint of one upload"""
+
+    def __init__(self):
+        self.peak_bytes = 0
+
+    def observe(self, *images: Image.Image):
+        self.peak_bytes = max(
+            self.peak_bytes, sum(decoded_size(image) for image in images)
+        )
+
+
+class MemoryBudget:
+    """Admits work by estimated bytes rather than by count"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, nbytes: int, timeout: float) -> int:
+        """Wait until nbytes fit, reserve them and return the amount reserved"""
+        # Anything bigger than the whole budget waits until it can run alone
+        nbytes = min(nbytes, self.capacity)
+        async with self._condition:
+            await asyncio.wait_for(
+                self._condition.wait_for(
+                    lambda: self.in_use + nbytes <= self.capacity
+                ),
+                timeout,
+            )
+            self.in_use += nbytes
+            IMAGE_MEMORY_IN_USE.inc(nbytes)
+        return nbytes
+
+    async def release(self, nbytes: int):
+        async with self._condition:
+            self.in_use -= nbytes
+            IMAGE_MEMORY_IN_USE.dec(nbytes)
+            self._condition.notify_all()
+
+
+memory_budget = MemoryBudget(IMAGE_MEMORY_BUDGET_MB * 1024 * 1024)
+_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
+
+async def run_in_image_pool(image: Image.Image, fn, *args):
+    """Run PIL work off the event loop once the memory budget admits it
+
+    Raises asyncio.TimeoutError if the budget stays exhausted for too long.
+    """
+    loop = asyncio.get_running_loop()
+    nbytes = await memory_budget.acquire(
+        estimated_working_set(image), IMAGE_ADMISSION_TIMEOUT
+    )
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        await memory_budget.release(nbytes)
+        raise
+
+    def release(_):
+        # Only once the job has really finished: a cancelled request doesn't
+        # stop a thread that is already decoding
+        try:
+            asyncio.run_coroutine_threadsafe(memory_budget.release(nbytes), loop)
+        except RuntimeError:
+            pass  # loop already closed at shutdown
+
+    future.add_done_callback(release)
+    return await asyncio.wrap_future(future)
+
+
+def shutdown():
+    """Let queued and running image jobs finish before the worker exits"""
+    _executor.shutdown(wait=True)
+
+
+def record_peak(tracker: PeakTracker):
+    IMAGE_PEAK_BYTES.observe(tracker.peak_bytes)
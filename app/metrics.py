@@ -0,0 +1,167 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from .querystats import current_query_stats
+
+# Set PROMETHEUS_MULTIPROC_DIR (before start-up) to aggregate across workers
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ["method", "route"],
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requests by route and status", ["method", "route", "status"]
+)
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements issued per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+HTTP_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per request", ["route"]
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum"
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity", "Pool size plus max overflow", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Pool checkout timeouts")
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "In-process cache lookups", ["cache", "result"]
+)
+
+IMAGE_STAGE_SECONDS = Histogram(
+    "image_pipeline_stage_seconds",
+    "Time per image pipeline stage",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+IMAGE_BYTES = Histogram(
+    "image_pipeline_bytes",
+    "Bytes entering and leaving the image pipeline",
+    ["direction"],
+    buckets=(10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000),
+)
+
+IMAGE_PEAK_BYTES = Histogram(
+    "image_upload_peak_decoded_bytes",
+    "Peak decoded pixel memory held by one upload",
+    buckets=(1e6, 5e6, 10e6, 25e6, 50e6, 100e6, 200e6, 400e6),
+)
+IMAGE_MEMORY_IN_USE = Gauge(
+    "image_memory_budget_in_use_bytes",
+    "Image memory budget currently reserved",
+    multiprocess_mode="livesum",
+)
+
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "single_flight_requests_total",
+    "Coalescable GETs by role: leader, follower or timeout",
+    ["role"],
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Event-loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+def route_path(scope) -> str:
+    """Route template for a request scope, falling back to the raw path"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+def route_label(scope) -> str:
+    return f"{scope.get('method', '')} {route_path(scope)}".strip()
+
+
+@event.listens_for(Pool, "checkout")
+def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(Pool, "checkin")
+def _pool_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """Time one stage of the image pipeline"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        IMAGE_STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording latency, status and SQL usage per route
+
+    SQL figures come from QueryStatsMiddleware, which must wrap this one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Unmatched paths would blow up label cardinality, so bucket them
+            route = route_path(scope) if scope.get("route") else "<unmatched>"
+            method = scope.get("method", "")
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status["code"])).inc()
+            stats = current_query_stats()
+            if stats is not None:
+                HTTP_DB_QUERIES.labels(route).observe(stats.count)
+                HTTP_DB_SECONDS.labels(route).observe(stats.seconds)
+
+
+def render_metrics():
+    """Exposition payload and content type, aggregated across workers if enabled"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
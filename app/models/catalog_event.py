@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class CatalogEvent(Base):
+    """One product/category/image change, written in the same transaction"""
+
+    __tablename__ = "catalog_events"
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True
+    )
+    entity_type = Column(String(20), nullable=False)  # product, category, image
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String(10), nullable=False)  # created, updated, deleted
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
@@ -34,11 +34,17 @@ class Image(Base):
     is_active = Column(Boolean, default=True)
     uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
+    )
 
     # Relationships
     uploader = relationship("User", backref="uploaded_images")
-    product = relationship("Product", back_populates="images", foreign_keys=[entity_id])
+    product = relationship(
+        "Product",
+        back_populates="images",
+        primaryjoin="and_(foreign(Image.entity_id) == Product.id, Image.entity_type == 'products')",
+    )
 
     def __repr__(self):
         return f"<Image(id={self.id}, filename='{self.filename}', entity_type='{self.entity_type}')>"
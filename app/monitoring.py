@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Optional
+
+import anyio.to_thread
+
+from .metrics import EVENT_LOOP_LAG, route_label
+
+logger = logging.getLogger(__name__)
+
+# How often the loop is sampled, and the lag that counts as a slow tick
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "200"))
+
+
+class RuntimeMonitor:
+    """Samples event-loop lag and anyio threadpool usage for this worker"""
+
+    def __init__(self, interval_ms: float, warn_ms: float):
+        self.interval = interval_ms / 1000
+        self.warn_threshold = warn_ms / 1000
+        self.inflight = {}
+        self.samples = 0
+        self.lag_seconds_total = 0.0
+        self.lag_seconds_max = 0.0
+        self.lag_seconds_last = 0.0
+        self.slow_ticks = 0
+        self.slow_ticks_by_route = Counter()
+        self.threadpool_total = 0
+        self.threadpool_active = 0
+        self.threadpool_waiting = 0
+        self.threadpool_waiting_max = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._record_lag(max(0.0, loop.time() - started - self.interval))
+            self._sample_threadpool()
+
+    def _record_lag(self, lag: float):
+        self.samples += 1
+        self.lag_seconds_total += lag
+        self.lag_seconds_last = lag
+        self.lag_seconds_max = max(self.lag_seconds_max, lag)
+        EVENT_LOOP_LAG.observe(lag)
+        if lag < self.warn_threshold:
+            return
+
+        # Whatever was in flight while the loop stalled is the likely culprit
+        routes = sorted({route_label(scope) for scope in self.inflight.values()})
+        self.slow_ticks += 1
+        self.slow_ticks_by_route.update(routes or ["<idle>"])
+        logger.warning(
+            f"Event loop blocked for {lag * 1000:.0f} ms while serving: "
+            f"{', '.join(routes) or 'no requests'}"
+        )
+
+    def _sample_threadpool(self):
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        statistics = limiter.statistics()
+        self.threadpool_total = int(limiter.total_tokens)
+        self.threadpool_active = statistics.borrowed_tokens
+        self.threadpool_waiting = statistics.tasks_waiting
+        self.threadpool_waiting_max = max(
+            self.threadpool_waiting_max, statistics.tasks_waiting
+        )
+
+    def stats(self) -> dict:
+        return {
+            "loop_lag": {
+                "samples": self.samples,
+                "last_ms": self.lag_seconds_last * 1000,
+                "max_ms": self.lag_seconds_max * 1000,
+                "mean_ms": (
+                    self.lag_seconds_total / self.samples * 1000 if self.samples else 0.0
+                ),
+                "slow_ticks": self.slow_ticks,
+                "slow_ticks_by_route": dict(self.slow_ticks_by_route),
+            },
+            "threadpool": {
+                "total": self.threadpool_total,
+                "active": self.threadpool_active,
+                "waiting": self.threadpool_waiting,
+                "waiting_max": self.threadpool_waiting_max,
+            },
+            "inflight_requests": len(self.inflight),
+        }
+
+
+runtime_monitor = RuntimeMonitor(LOOP_MONITOR_INTERVAL_MS, LOOP_LAG_WARN_MS)
+
+
+class InflightRequestMiddleware:
+    """ASGI middleware that tells the monitor which requests are being served"""
+
+    def __init__(self, app, monitor: RuntimeMonitor = runtime_monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = id(scope)
+
+        async def send_wrapper(message):
+            # An SSE stream stays open for hours, mostly idle; counting it as
+            # in flight would get it blamed for every slow tick after
+            if message["type"] == "http.response.start" and _is_event_stream(message):
+                self.monitor.inflight.pop(key, None)
+            await send(message)
+
+        self.monitor.inflight[key] = scope
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.monitor.inflight.pop(key, None)
+
+
+def _is_event_stream(message) -> bool:
+    for name, value in message.get("headers", []):
+        if name.lower() == b"content-type":
+            return value.split(b";")[0].strip() == b"text/event-stream"
+    return False
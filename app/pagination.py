@@ -0,0 +1,60 @@
+import os
+from typing import Optional
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+
+# Above this many rows (per planner statistics) listings show "~N" instead of
+# running an exact count over the whole table
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ESTIMATED_COUNT_THRESHOLD", "100000"))
+
+
+def paginate(query: Query, offset: int, limit: int):
+    """Fetch one page and the total row count in a single windowed query"""
+    rows = (
+        query.add_columns(func.count().over().label("total_count"))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        return [row[0] for row in rows], rows[0].total_count
+
+    # An empty page past the end carries no window total, so fall back once
+    if offset == 0:
+        return [], 0
+    return [], query.order_by(None).count()
+
+
+async def paginate_async(db: AsyncSession, stmt: Select, offset: int, limit: int):
+    """Async variant of paginate for 2.0-style select() statements"""
+    result = await db.execute(
+        stmt.add_columns(func.count().over().label("total_count"))
+        .offset(offset)
+        .limit(limit)
+    )
+    rows = result.all()
+    if rows:
+        return [row[0] for row in rows], rows[0].total_count
+
+    if offset == 0:
+        return [], 0
+    total = await db.scalar(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    )
+    return [], total
+
+
+def estimated_count(db: Session, table_name: str) -> Optional[int]:
+    """Planner row estimate for a table, or None when it isn't available"""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name},
+    ).scalar()
+    # reltuples is -1 for tables that have never been analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from .throttle import TokenBucketLimiter
+
+# bcrypt cost; hashes stored with any other cost are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Hashing gets its own small pool so a login burst can't take over the
+# threadpool every sync endpoint runs on
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+login_ip_limiter = TokenBucketLimiter(
+    capacity=float(os.getenv("LOGIN_IP_BURST", "20")),
+    per_minute=float(os.getenv("LOGIN_IP_PER_MINUTE", "20")),
+)
+login_user_limiter = TokenBucketLimiter(
+    capacity=float(os.getenv("LOGIN_USER_BURST", "5")),
+    per_minute=float(os.getenv("LOGIN_USER_PER_MINUTE", "5")),
+)
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full and the request should back off"""
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+async def _run_hasher(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_QUEUE:
+            raise HasherBusy()
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hasher(pwd_context.hash, password)
+
+
+async def verify_and_update(
+    password: str, hashed_password: Optional[str]
+) -> Tuple[bool, Optional[str]]:
+    """Check a password off the event loop, returning a new hash if the cost changed"""
+    if hashed_password is None:
+        # Spend the same time as a real check so unknown usernames don't stand out
+        await _run_hasher(pwd_context.dummy_verify)
+        return False, None
+    return await _run_hasher(pwd_context.verify_and_update, password, hashed_password)
+
+
+def hasher_stats() -> dict:
+    return {"workers": PASSWORD_HASH_WORKERS, "pending": _pending}
+
+
+def login_retry_after(client_ip: str, username: Optional[str]) -> float:
+    """Charge the IP and username buckets; non-zero means reject without hashing"""
+    wait = login_ip_limiter.acquire(client_ip)
+    if wait:
+        return wait
+    return login_user_limiter.acquire((username or "").lower())
@@ -0,0 +1,262 @@
+import asyncio
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
+from starlette import concurrency
+
+# Admins can profile a single request with ?profile=text|file or X-Profile
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "true").lower() == "true"
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_REPORT_LINES = 60
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "active_profile", default=None
+)
+_running = 0
+_running_lock = threading.Lock()
+# cProfile hooks are per thread, and every async endpoint shares the loop
+# thread: a second profiler enabled there would replace the first one's hook
+_profiled_threads = set()
+_profiled_threads_lock = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile runs collected for one request, across the threads it touched"""
+
+    def __init__(self):
+        self.profilers = []
+        self.skipped = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profiling(self):
+        thread = threading.get_ident()
+        with _profiled_threads_lock:
+            busy = thread in _profiled_threads
+            _profiled_threads.add(thread)
+        if busy:
+            # Another request's profiler owns this thread; run unprofiled
+            self.skipped = True
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with _profiled_threads_lock:
+                _profiled_threads.discard(thread)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        if not self.profilers:
+            return None
+        stats = pstats.Stats(self.profilers[0])
+        for profiler in self.profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+    def report(self) -> str:
+        stats = self.stats()
+        if stats is None:
+            return "No endpoint code was profiled for this request\n"
+        output = io.StringIO()
+        if self.skipped:
+            output.write(
+                "Partial profile: some of this request ran on a thread another "
+                "profiled request was using\n\n"
+            )
+        stats.stream = output
+        stats.sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+        return output.getvalue()
+
+    def dump(self, path: Path):
+        stats = self.stats()
+        if stats is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(path))
+
+
+def _profiled_sync(call: Callable) -> Callable:
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        with profile.profiling():
+            return call(*args, **kwargs)
+
+    return wrapper
+
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """starlette's run_in_threadpool, profiling `func` in its worker thread
+
+    The loop thread's profiler doesn't see work handed to the threadpool, so
+    endpoints that offload their queries should use this instead.
+    """
+    return await concurrency.run_in_threadpool(_profiled_sync(func), *args, **kwargs)
+
+
+def profiled_endpoint(call: Callable) -> Callable:
+    """Wrap an endpoint so it runs under the request's profiler when one is active
+
+    Sync endpoints are profiled inside the threadpool thread that runs them.
+    Async endpoints are profiled on the event loop, so anything else the loop
+    runs while they await is included as well; work they offload is profiled
+    only when it goes through run_in_threadpool above.
+    """
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            profile = _active_profile.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            with profile.profiling():
+                return await call(*args, **kwargs)
+
+        async_wrapper.profiled = True
+        return async_wrapper
+
+    wrapper = _profiled_sync(call)
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument_routes(app):
+    """Wrap every API endpoint; call once all routers are included"""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(
+            route.dependant.call, "profiled", False
+        ):
+            route.dependant.call = profiled_endpoint(route.dependant.call)
+
+
+def _requested_mode(scope) -> Optional[str]:
+    headers = dict(scope.get("headers") or [])
+    mode = headers.get(b"x-profile", b"").decode()
+    if not mode:
+        query = parse_qs(scope.get("query_string", b"").decode())
+        mode = query.get("profile", [""])[0]
+    if not mode:
+        return None
+    return "text" if mode == "text" else "file"
+
+
+def _bearer_token(scope) -> Optional[str]:
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode()
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+def _acquire_slot() -> bool:
+    global _running
+    with _running_lock:
+        if _running >= PROFILE_MAX_CONCURRENT:
+            return False
+        _running += 1
+        return True
+
+
+def _release_slot():
+    global _running
+    with _running_lock:
+        _running -= 1
+
+
+class ProfilingMiddleware:
+    """Runs one request under the profiler when an authorized admin asks for it
+
+    `?profile=text` (or `X-Profile: text`) replaces the response with a
+    cumulative-time report. Any other value keeps the normal response and
+    writes a .prof file (for snakeviz/flameprof) named in X-Profile-File.
+    """
+
+    def __init__(self, app, authorize: Callable[[str], Awaitable[bool]]):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        mode = _requested_mode(scope) if scope["type"] == "http" else None
+        if not REQUEST_PROFILING or mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        if token is None or not await self.authorize(token):
+            response = JSONResponse({"detail": "Profiling requires an admin"}, 403)
+            await response(scope, receive, send)
+            return
+
+        if not _acquire_slot():
+            response = JSONResponse(
+                {"detail": "Too many profiled requests in progress"},
+                429,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        context_token = _active_profile.set(profile)
+        try:
+            if mode == "text":
+                await self._profile_as_text(profile, scope, receive, send)
+            else:
+                await self._profile_to_file(profile, scope, receive, send)
+        finally:
+            _active_profile.reset(context_token)
+            _release_slot()
+
+    async def _profile_as_text(self, profile, scope, receive, send):
+        status = {"code": None}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        started = time.perf_counter()
+        await self.app(scope, receive, capture)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        header = (
+            f"{scope.get('method')} {scope.get('path')} -> {status['code']} "
+            f"in {elapsed_ms:.1f} ms\n\n"
+        )
+        response = PlainTextResponse(header + profile.report())
+        await response(scope, receive, send)
+
+    async def _profile_to_file(self, profile, scope, receive, send):
+        path = PROFILE_DIR / f"{int(time.time())}-{uuid.uuid4().hex[:8]}.prof"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", str(path).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.dump(path)
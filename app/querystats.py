@@ -0,0 +1,138 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Adds X-DB-* response headers; meant for development, not production
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").lower() == "true"
+
+# The same statement shape this many times in one request looks like an N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize SQL so executions that differ only in IN-list size compare equal"""
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("IN (...)", statement)).strip()
+
+
+class QueryStats:
+    """SQL statements and time spent in them for one request"""
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+# Threadpool calls and async sessions inherit the request's QueryStats object
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_queries.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - conn.info["query_started"])
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware counting SQL per request and flagging likely N+1 patterns"""
+
+    def __init__(self, app, debug_headers: bool = SQL_DEBUG_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.debug_headers:
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                    (b"x-db-repeated-shapes", str(len(stats.repeated_shapes())).encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_queries.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            for shape, count in stats.repeated_shapes():
+                logger.warning(
+                    f"Possible N+1 on {scope.get('method')} {scope.get('path')}: "
+                    f"{count}x {shape[:200]}"
+                )
+
+
+@contextmanager
+def count_queries():
+    """Count every statement run on any engine while the block is active
+
+    Unlike the per-request tracking this works across threads, so it also sees
+    requests made through fastapi.testclient.TestClient.
+    """
+    stats = QueryStats()
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, 0.0)
+
+    event.listen(Engine, "after_cursor_execute", listener)
+    try:
+        yield stats
+    finally:
+        event.remove(Engine, "after_cursor_execute", listener)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """Test helper, e.g. `with assert_max_queries(2): client.get("/api/products")`"""
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= max_queries, (
+        f"Expected at most {max_queries} queries, got {stats.count}:\n"
+        + "\n".join(f"{count}x {shape}" for shape, count in stats.shapes.most_common())
+    )
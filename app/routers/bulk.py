@@ -0,0 +1,129 @@
+import csv
+import io
+from typing import Callable, List, Literal, Optional
+
+from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from ..auth import get_current_user
+from ..bulk import (
+    MAX_BULK_ROWS,
+    bulk_summary,
+    upsert_categories,
+    upsert_products,
+    validate_rows,
+)
+from ..catalog import notify_catalog_changed
+from ..catalog_import import format_for, import_products, parse_rows
+from ..database import get_db
+from ..main import CategoryCreate, ProductCreate, User
+from ..profiling import run_in_threadpool
+
+router = APIRouter()
+
+
+def _bulk_upsert(
+    db: Session,
+    rows: List[dict],
+    schema,
+    key: str,
+    upsert: Callable,
+    all_or_nothing: bool,
+) -> dict:
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_ROWS} rows per request"
+        )
+
+    valid, errors = validate_rows(rows, schema, key)
+    if errors and all_or_nothing:
+        raise HTTPException(status_code=422, detail=bulk_summary(errors))
+
+    # Every valid row is written in one transaction, or none are
+    try:
+        results = upsert(db, valid) if valid else []
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Bulk write rejected: {e.orig}")
+    if results:
+        notify_catalog_changed()
+    return bulk_summary(results + errors)
+
+
+@router.post("/products/bulk")
+def bulk_upsert_products(
+    rows: List[dict] = Body(...),
+    all_or_nothing: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Create or update products matched by `sku`, with a result per row"""
+    return _bulk_upsert(db, rows, ProductCreate, "sku", upsert_products, all_or_nothing)
+
+
+@router.post("/categories/bulk")
+def bulk_upsert_categories(
+    rows: List[dict] = Body(...),
+    all_or_nothing: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Create or update categories matched by `name`, with a result per row"""
+    return _bulk_upsert(
+        db, rows, CategoryCreate, "name", upsert_categories, all_or_nothing
+    )
+
+
+def _import_stopped(status_code: int, reason, resume_from: int) -> HTTPException:
+    # Batches before resume_from are committed; resending with it skips them
+    return HTTPException(
+        status_code=status_code,
+        detail={"message": f"Import stopped: {reason}", "resume_from": resume_from},
+    )
+
+
+def _run_import(file, format: str, dry_run: bool, resume_from: int) -> dict:
+    committed = [resume_from]
+    lines = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        report = import_products(
+            parse_rows(lines, format),
+            dry_run=dry_run,
+            resume_from=resume_from,
+            on_commit=committed.append,
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise _import_stopped(400, f"unreadable file ({e})", committed[-1])
+    except IntegrityError as e:
+        raise _import_stopped(409, e.orig, committed[-1])
+    except DBAPIError as e:
+        raise _import_stopped(503, e.orig, committed[-1])
+    finally:
+        lines.detach()
+    return report.as_dict()
+
+
+@router.post("/products/import")
+async def import_product_feed(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    dry_run: bool = False,
+    resume_from: int = 0,
+    current_user: User = Depends(get_current_user),
+):
+    """Upsert products by SKU (or id) from a CSV or NDJSON upload of any size
+
+    The upload is parsed as a stream and committed in batches. If it fails
+    part-way, send it again with `resume_from` set to the row it stopped at.
+    `dry_run=true` reports what would be created or updated without writing.
+    """
+    format = format or format_for(file.filename)
+    if format is None:
+        raise HTTPException(
+            status_code=400, detail="Pass format=csv or format=ndjson"
+        )
+    return await run_in_threadpool(
+        _run_import, file.file, format, dry_run, max(resume_from, 0)
+    )
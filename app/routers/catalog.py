@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+
+from ..changefeed import CHANGE_FEED_BATCH, change_feed, event_id_bounds, events_since
+
+router = APIRouter()
+
+SSE_KEEPALIVE_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+
+def _sse(event: dict) -> str:
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['entity_type']}\n"
+        f"data: {json.dumps(event)}\n\n"
+    )
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def _catch_up(last_id: int):
+    """Events after last_id, or None if some have already been compacted away"""
+    oldest, newest = await event_id_bounds()
+    if oldest is not None and last_id < oldest - 1:
+        return None
+    backlog = []
+    while newest is not None and last_id < newest:
+        events = await events_since(last_id)
+        if not events:
+            break
+        backlog.extend(events)
+        last_id = events[-1]["id"]
+        if len(backlog) > CHANGE_FEED_BATCH * 10:
+            return None
+    return backlog
+
+
+async def _stream(last_id: Optional[int]):
+    # Subscribe first so nothing committed during the catch-up is missed
+    subscription = change_feed.subscribe()
+    sent = set()
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if last_id is not None:
+            backlog = await _catch_up(last_id)
+            if backlog is None:
+                # Too far behind: the client should reload the catalog in full
+                yield "event: reset\ndata: {}\n\n"
+                backlog = []
+            for event in backlog:
+                yield _sse(event)
+            sent = {event["id"] for event in backlog}
+
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            # Live events can arrive below the last id sent, when their
+            # transaction committed late; only skip what the catch-up sent
+            if event["id"] in sent:
+                continue
+            yield _sse(event)
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+@router.get("/changes")
+async def catalog_changes(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events stream of product, category and image changes
+
+    Reconnecting EventSource clients send Last-Event-ID and get everything
+    they missed; `?last_event_id=` does the same for the first connection.
+    """
+    resume_from = _parse_event_id(
+        last_event_id or request.query_params.get("last_event_id")
+    )
+    return StreamingResponse(
+        _stream(resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+import zlib
+from typing import Literal
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from ..database import async_read_session, wrote_recently
+from ..main import Product
+from ..models.image import Image
+
+router = APIRouter()
+
+# Rows fetched per server-side cursor round trip, and per image lookup
+EXPORT_BATCH_SIZE = 500
+EXPORT_GZIP_LEVEL = 6
+
+EXPORT_COLUMNS = (
+    Product.id,
+    Product.sku,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.category,
+    Product.image_url,
+    Product.created_at,
+    Product.updated_at,
+)
+CSV_HEADER = [column.key for column in EXPORT_COLUMNS] + ["images"]
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+async def _image_urls(db, product_ids) -> dict:
+    result = await db.execute(
+        select(Image.entity_id, Image.filename)
+        .where(
+            Image.entity_type == "products",
+            Image.entity_id.in_(product_ids),
+            Image.is_active == True,
+        )
+        .order_by(Image.entity_id, Image.id)
+    )
+    urls = {}
+    for entity_id, filename in result:
+        urls.setdefault(entity_id, []).append(f"/api/images/products/{filename}")
+    return urls
+
+
+def _record(row, urls) -> dict:
+    record = row._asdict()
+    record["created_at"] = _iso(record["created_at"])
+    record["updated_at"] = _iso(record["updated_at"])
+    record["images"] = urls.get(row.id, [])
+    return record
+
+
+def _ndjson(rows, urls) -> str:
+    lines = [json.dumps(_record(row, urls), ensure_ascii=False) for row in rows]
+    return "\n".join(lines) + "\n"
+
+
+def _csv(rows, urls, buffer: io.StringIO) -> str:
+    buffer.seek(0)
+    buffer.truncate()
+    writer = csv.writer(buffer)
+    for row in rows:
+        record = _record(row, urls)
+        # Uploaded filenames are uuids, so a space can separate the URLs
+        record["images"] = " ".join(record["images"])
+        writer.writerow(record[name] for name in CSV_HEADER)
+    return buffer.getvalue()
+
+
+async def _export(format: str, use_replica: bool):
+    """Encoded batches; only one batch of rows is ever held in memory"""
+    buffer = io.StringIO()
+    if format == "csv":
+        csv.writer(buffer).writerow(CSV_HEADER)
+        yield buffer.getvalue()
+
+    async with async_read_session(use_replica) as db:
+        # yield_per makes stream() use a server-side cursor
+        result = await db.stream(
+            select(*EXPORT_COLUMNS)
+            .order_by(Product.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            urls = await _image_urls(db, [row.id for row in rows])
+            if format == "csv":
+                yield _csv(rows, urls, buffer)
+            else:
+                yield _ndjson(rows, urls)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether Accept-Encoding allows gzip, honouring q-values (gzip;q=0 is a no)"""
+    wildcard = None
+    for coding in accept_encoding.split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.lower() == "gzip":
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
+
+
+async def _encode(chunks, gzip: bool):
+    compressor = None
+    if gzip:
+        # wbits 31 selects the gzip container rather than raw zlib
+        compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = chunk.encode()
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
+
+
+@router.get("/export")
+async def export_products(
+    request: Request, format: Literal["ndjson", "csv"] = "ndjson"
+):
+    """Every product with its active image URLs, streamed in id order
+
+    Compressed on the fly when the client accepts gzip.
+    """
+    gzip = accepts_gzip(request.headers.get("accept-encoding", ""))
+    headers = {
+        "Content-Disposition": f'attachment; filename="products.{format}"',
+        "Cache-Control": "no-store",
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _encode(_export(format, not wrote_recently(request)), gzip),
+        media_type=f"{media_type}; charset=utf-8",
+        headers=headers,
+    )
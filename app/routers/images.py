@@ -1,10 +1,10 @@
+import asyncio
 import hashlib
 import io
 import logging
 import os
 import shutil
 import uuid
-from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
@@ -12,13 +12,16 @@ from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Up
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from PIL import Image, ImageOps
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import get_current_user
-from ..database import get_db
+from ..database import get_async_db, get_async_read_db
+from ..image_pool import PeakTracker, record_peak, run_in_image_pool
 from ..main import User
+from ..metrics import IMAGE_BYTES, observe_stage
 from ..models.image import Image as ImageModel
+from ..pagination import paginate_async
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -142,6 +145,38 @@ def create_thumbnail(image: Image.Image, size: tuple = THUMBNAIL_SIZE) -> Image.
     return thumb
 
 
+def process_upload(image: Image.Image, main_path: Path, thumb_path: Path):
+    """Decode, resize, encode and save one upload; runs in the image worker pool"""
+    peak = PeakTracker()
+
+    with observe_stage("decode"):
+        image.load()
+    peak.observe(image)
+
+    with observe_stage("resize"):
+        # Optimize main image
+        optimized_image = optimize_image(image)
+        peak.observe(image, optimized_image)
+
+        # Create thumbnail
+        thumbnail = create_thumbnail(image)
+        peak.observe(image, optimized_image, thumbnail)
+
+    with observe_stage("encode"):
+        main_buffer = io.BytesIO()
+        optimized_image.save(main_buffer, "JPEG", quality=QUALITY, optimize=True)
+        thumb_buffer = io.BytesIO()
+        thumbnail.save(thumb_buffer, "JPEG", quality=QUALITY, optimize=True)
+
+    with observe_stage("save"):
+        main_path.write_bytes(main_buffer.getvalue())
+        thumb_path.write_bytes(thumb_buffer.getvalue())
+
+    record_peak(peak)
+    IMAGE_BYTES.labels("out").observe(main_buffer.tell() + thumb_buffer.tell())
+    return optimized_image.width, optimized_image.height, main_buffer.tell()
+
+
 def cleanup_temp_files(temp_path: str):
     """Background task to clean up temporary files"""
     try:
@@ -159,7 +194,7 @@ async def upload_image(
     alt_text: Optional[str] = None,
     entity_id: Optional[int] = None,
     background_tasks: BackgroundTasks = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Upload and process image with comprehensive validation and optimization"""
@@ -181,16 +216,25 @@ async def upload_image(
     if file_size == 0:
         raise HTTPException(400, "Empty file")
 
+    IMAGE_BYTES.labels("in").observe(file_size)
+
     # Validate content
-    mime_type = validate_image_content(file_content, file.filename)
+    with observe_stage("validate"):
+        mime_type = validate_image_content(file_content, file.filename)
 
     # Generate secure filename
     file_hash = hashlib.sha256(file_content).hexdigest()[:16]
     file_extension = Path(file.filename).suffix.lower()
     unique_filename = f"{uuid.uuid4().hex}_{file_hash}{file_extension}"
 
+    # Save files
+    entity_dir = UPLOAD_DIR / entity_type
+    main_path = entity_dir / unique_filename
+    thumb_filename = f"thumb_{unique_filename}"
+    thumb_path = entity_dir / thumb_filename
+
     try:
-        # Process image
+        # Process image (only the header is read here)
         image = Image.open(io.BytesIO(file_content))
 
         # Validate image dimensions
@@ -199,27 +243,15 @@ async def upload_image(
                 400, f"Image dimensions too large. Max: {MAX_WIDTH*2}x{MAX_HEIGHT*2}"
             )
 
-        # Optimize main image
-        optimized_image = optimize_image(image)
-
-        # Create thumbnail
-        thumbnail = create_thumbnail(image)
-
-        # Save files
-        entity_dir = UPLOAD_DIR / entity_type
-        main_path = entity_dir / unique_filename
-        thumb_filename = f"thumb_{unique_filename}"
-        thumb_path = entity_dir / thumb_filename
-
-        # Save optimized image
-        optimized_image.save(main_path, "JPEG", quality=QUALITY, optimize=True)
-
-        # Save thumbnail
-        thumbnail.save(thumb_path, "JPEG", quality=QUALITY, optimize=True)
-
-        # Get final file sizes
-        final_size = main_path.stat().st_size
-        thumb_size = thumb_path.stat().st_size
+        # Pixel work runs in the image pool once the memory budget admits it
+        try:
+            width, height, final_size = await run_in_image_pool(
+                image, process_upload, image, main_path, thumb_path
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                503, "Image processing is busy, please retry shortly"
+            )
 
         # Save to database
         db_image = ImageModel(
@@ -229,8 +261,8 @@ async def upload_image(
             thumbnail_path=str(thumb_path),
             file_size=final_size,
             mime_type="image/jpeg",  # We convert everything to JPEG
-            width=optimized_image.width,
-            height=optimized_image.height,
+            width=width,
+            height=height,
             entity_type=entity_type,
             entity_id=entity_id,
             alt_text=alt_text,
@@ -238,8 +270,8 @@ async def upload_image(
         )
 
         db.add(db_image)
-        db.commit()
-        db.refresh(db_image)
+        await db.commit()
+        await db.refresh(db_image)
 
         logger.info(f"Image uploaded: {unique_filename} by user {current_user.id}")
 
@@ -249,18 +281,20 @@ async def upload_image(
             "filename": unique_filename,
             "url": f"/api/images/{entity_type}/{unique_filename}",
             "thumbnail_url": f"/api/images/{entity_type}/thumb_{unique_filename}",
-            "width": optimized_image.width,
-            "height": optimized_image.height,
+            "width": width,
+            "height": height,
             "size": final_size,
             "mime_type": "image/jpeg",
         }
 
     except Exception as e:
-        logger.error(f"Image upload failed: {e}")
         # Clean up any partially created files
         for path in [main_path, thumb_path]:
             if path.exists():
                 path.unlink()
+        if isinstance(e, HTTPException):
+            raise
+        logger.error(f"Image upload failed: {e}")
         raise HTTPException(500, f"Image processing failed: {str(e)}")
 
 
@@ -292,11 +326,11 @@ async def get_image(entity_type: str, filename: str):
 @router.get("/meta/{image_id}")
 async def get_image_metadata(
     image_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get image metadata"""
-    image = db.query(ImageModel).filter(ImageModel.id == image_id).first()
+    image = await db.get(ImageModel, image_id)
     if not image:
         raise HTTPException(404, "Image not found")
 
@@ -325,11 +359,11 @@ async def update_image_metadata(
     alt_text: Optional[str] = None,
     entity_id: Optional[int] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update image metadata"""
-    image = db.query(ImageModel).filter(ImageModel.id == image_id).first()
+    image = await db.get(ImageModel, image_id)
     if not image:
         raise HTTPException(404, "Image not found")
 
@@ -341,8 +375,9 @@ async def update_image_metadata(
     if is_active is not None:
         image.is_active = is_active
 
-    image.updated_at = datetime.utcnow()
-    db.commit()
+    # Database clock, like every other timestamp /api/sync compares
+    image.updated_at = func.now()
+    await db.commit()
 
     return {"message": "Image updated successfully"}
 
@@ -351,11 +386,11 @@ async def update_image_metadata(
 async def delete_image(
     image_id: int,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Delete image and clean up files"""
-    image = db.query(ImageModel).filter(ImageModel.id == image_id).first()
+    image = await db.get(ImageModel, image_id)
     if not image:
         raise HTTPException(404, "Image not found")
 
@@ -367,8 +402,8 @@ async def delete_image(
         files_to_delete.append(image.thumbnail_path)
 
     # Delete from database
-    db.delete(image)
-    db.commit()
+    await db.delete(image)
+    await db.commit()
 
     # Clean up files in background
     for file_path in files_to_delete:
@@ -385,19 +420,18 @@ async def list_images(
     entity_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """List images with pagination"""
-    query = db.query(ImageModel).filter(
+    query = select(ImageModel).where(
         and_(ImageModel.entity_type == entity_type, ImageModel.is_active == True)
     )
 
     if entity_id is not None:
-        query = query.filter(ImageModel.entity_id == entity_id)
+        query = query.where(ImageModel.entity_id == entity_id)
 
-    total = query.count()
-    images = query.offset(skip).limit(limit).all()
+    images, total = await paginate_async(db, query, skip, limit)
 
     return {
         "total": total,
@@ -0,0 +1,245 @@
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal, get_async_db
+from ..main import Category, CategoryResponse, Product
+from ..models.image import Image
+from ..models.tombstone import Tombstone
+
+router = APIRouter()
+
+# Tombstones older than this are compacted away; older tokens need a full resync
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+# Rows are stamped with now(), their transaction's start, and become visible at
+# commit. On PostgreSQL the token never moves past the oldest open transaction,
+# however long it runs; this margin covers SQLite, where that isn't known.
+# Clients upsert by id, so re-sent rows are harmless.
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+SYNC_PAGE_SIZE = 1000
+COMPACTION_INTERVAL = 3600.0
+
+# stream name -> (model, timestamp column)
+STREAMS = {
+    "products": (Product, Product.updated_at),
+    "categories": (Category, Category.updated_at),
+    "images": (Image, Image.updated_at),
+    "deleted": (Tombstone, Tombstone.deleted_at),
+}
+
+_compacted_at = 0.0
+
+
+def encode_token(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands back naive UTC timestamps
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _parse_time(value) -> datetime:
+    return _as_utc(datetime.fromisoformat(value))
+
+
+def decode_token(token: str) -> dict:
+    """Token state with times and cursors parsed; 400 for anything malformed"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if state.get("v") != 1:
+            raise ValueError(state.get("v"))
+        if "until" not in state:
+            return {"at": _parse_time(state["at"])}
+
+        cursors = {}
+        for stream, cursor in state["cursors"].items():
+            if stream not in STREAMS:
+                raise ValueError(stream)
+            ts, row_id = cursor
+            cursors[stream] = (_parse_time(ts), int(row_id))
+        until = _parse_time(state["until"])
+        return {
+            "lower": _parse_time(state["lower"]) if state["lower"] else None,
+            "until": until,
+            "at": _parse_time(state["at"]) if state.get("at") else until,
+            "cursors": cursors,
+        }
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def _product_payload(product: Product) -> dict:
+    # Images travel in their own stream, so the relationship is never loaded
+    return {
+        "id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "category": product.category,
+        "image_url": product.image_url,
+        "created_at": product.created_at,
+        "updated_at": product.updated_at,
+    }
+
+
+def _image_payload(image: Image) -> dict:
+    return {
+        "id": image.id,
+        "filename": image.filename,
+        "url": f"/api/images/{image.entity_type}/{image.filename}",
+        "thumbnail_url": f"/api/images/{image.entity_type}/thumb_{image.filename}",
+        "entity_type": image.entity_type,
+        "entity_id": image.entity_id,
+        "alt_text": image.alt_text,
+        "is_active": image.is_active,
+        "updated_at": image.updated_at,
+    }
+
+
+def _tombstone_payload(tombstone: Tombstone) -> dict:
+    return {
+        "entity_type": tombstone.entity_type,
+        "entity_id": tombstone.entity_id,
+        "deleted_at": tombstone.deleted_at,
+    }
+
+
+async def _page(db: AsyncSession, stream: str, lower, until, cursor, limit):
+    """One keyset page of a stream: lower <= ts <= until, after (ts, id) cursor"""
+    model, column = STREAMS[stream]
+    if db.bind.dialect.name == "sqlite":
+        # Timestamps are text there, written by CURRENT_TIMESTAMP and by
+        # SQLAlchemy in different formats; compare them normalised
+        column, lower, until = (
+            func.datetime(value) if value is not None else None
+            for value in (column, lower, until)
+        )
+        if cursor is not None:
+            cursor = (func.datetime(cursor[0]), cursor[1])
+
+    stmt = select(model).where(column <= until)
+    if lower is not None:
+        stmt = stmt.where(column >= lower)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(column, model.id) > tuple_(*cursor))
+    result = await db.execute(stmt.order_by(column, model.id).limit(limit))
+    return result.scalars().all()
+
+
+async def _watermark(db: AsyncSession, now: datetime) -> datetime:
+    """Where the next sync resumes: `now`, held back to the oldest open transaction
+
+    A transaction that started before `now` stamps its rows with its own start
+    time but commits later, so this sync can't see them; resuming from its
+    start re-reads them once they land.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return now
+    oldest = await db.scalar(
+        text(
+            "SELECT min(xact_start) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND pid <> pg_backend_pid() "
+            "AND backend_type = 'client backend'"
+        )
+    )
+    return min(now, oldest) if oldest else now
+
+
+async def compact_tombstones():
+    global _compacted_at
+    _compacted_at = time.monotonic()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff))
+        await db.commit()
+
+
+@router.get("/sync")
+async def sync_catalog(
+    background_tasks: BackgroundTasks,
+    since: Optional[str] = None,
+    limit: int = SYNC_PAGE_SIZE,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Products, categories and images changed since a token, plus deletions
+
+    Without a token, or with one older than the tombstone horizon, the first
+    reply has `full_resync: true` and the client should replace its copy.
+    Keep calling with `next` while `has_more` is set; store the final `next`
+    for the following sync.
+
+    Always reads the primary, with the window's end taken from the database
+    clock: a lagging replica or a skewed app server clock would move the
+    watermark past rows the client never received.
+    """
+    limit = max(1, min(limit, SYNC_PAGE_SIZE))
+    state = decode_token(since) if since else {}
+
+    full_resync = False
+    if "until" in state:
+        # Continuing a paged run: same window, per-stream cursors
+        lower = state["lower"]
+        until = state["until"]
+        watermark = state["at"]
+        cursors = state["cursors"]
+    else:
+        now = _as_utc(await db.scalar(select(func.now())))
+        horizon = now - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        since_at = state.get("at")
+        full_resync = since_at is None or since_at < horizon
+        lower = (
+            None
+            if full_resync
+            else since_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        )
+        until = now
+        watermark = await _watermark(db, now)
+        cursors = {stream: None for stream in STREAMS}
+        if full_resync:
+            # A fresh copy has nothing to delete
+            del cursors["deleted"]
+
+    rows = {}
+    next_cursors = {}
+    for stream, cursor in cursors.items():
+        rows[stream] = await _page(db, stream, lower, until, cursor, limit)
+        if len(rows[stream]) == limit:
+            last = rows[stream][-1]
+            column = STREAMS[stream][1].key
+            next_cursors[stream] = [getattr(last, column).isoformat(), last.id]
+
+    if next_cursors:
+        next_state = {
+            "v": 1,
+            "lower": lower.isoformat() if lower else None,
+            "until": until.isoformat(),
+            "at": watermark.isoformat(),
+            "cursors": next_cursors,
+        }
+    else:
+        next_state = {"v": 1, "at": watermark.isoformat()}
+
+    if time.monotonic() - _compacted_at >= COMPACTION_INTERVAL:
+        background_tasks.add_task(compact_tombstones)
+
+    return {
+        "full_resync": full_resync,
+        "products": [_product_payload(p) for p in rows.get("products", [])],
+        "categories": [
+            CategoryResponse.model_validate(c).model_dump()
+            for c in rows.get("categories", [])
+        ],
+        "images": [_image_payload(image) for image in rows.get("images", [])],
+        "deleted": [_tombstone_payload(t) for t in rows.get("deleted", [])],
+        "next": encode_token(next_state),
+        "has_more": bool(next_cursors),
+    }
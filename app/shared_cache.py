@@ -0,0 +1,251 @@
+import json
+import logging
+import math
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+import redis
+from starlette.concurrency import run_in_threadpool
+
+from .cache import TTLCache
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Shared tier for every worker and replica; unset means in-process caching only
+REDIS_URL = os.getenv("REDIS_URL", "")
+SHARED_CACHE_PREFIX = os.getenv("SHARED_CACHE_PREFIX", "vape")
+INVALIDATION_CHANNEL = f"{SHARED_CACHE_PREFIX}:invalidate"
+
+# Redis trouble must never stall a request for long; we fall back to L1 only
+_client = (
+    redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    if REDIS_URL
+    else None
+)
+_MISSING = object()
+
+# topic -> callbacks(key) run when any process publishes an invalidation
+_subscribers = defaultdict(list)
+
+
+def _shared_tier_failed(e: Exception):
+    logger.warning(f"Shared cache unavailable, serving from local cache only: {e}")
+
+
+def subscribe(topic: str, callback: Callable[[Optional[str]], None]):
+    """Run callback(key) whenever any process publishes on topic (key None = all)"""
+    _subscribers[topic].append(callback)
+
+
+class _Publisher:
+    """Sends invalidations to Redis from a background thread, in order
+
+    publish() runs in commit hooks, which for AsyncSession are on the event
+    loop thread; a slow or unreachable Redis must not stall the loop.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def send(self, message: str):
+        # Threads don't survive a fork, so each worker starts its own
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="cache-invalidation", daemon=True
+                    )
+                    self._thread.start()
+        self._queue.put(message)
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            try:
+                _client.publish(INVALIDATION_CHANNEL, message)
+            except redis.RedisError as e:
+                _shared_tier_failed(e)
+                _dispatch(message)
+
+
+_publisher = _Publisher()
+
+
+def publish(topic: str, key: Optional[str] = None):
+    """Tell every process, this one included, to drop state for topic/key"""
+    message = json.dumps({"topic": topic, "key": key})
+    if _client is None:
+        _dispatch(message)
+    else:
+        _publisher.send(message)
+
+
+def _dispatch(message):
+    payload = json.loads(message)
+    for callback in _subscribers.get(payload["topic"], ()):
+        try:
+            callback(payload["key"])
+        except Exception as e:
+            logger.warning(f"Invalidation handler for {payload['topic']} failed: {e}")
+
+
+class TwoTierCache:
+    """Per-process TTLCache (L1) in front of a shared Redis tier (L2)
+
+    Keys are strings. L1 entries live for at most `local_ttl`, which bounds
+    staleness if an invalidation message is ever missed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        maxsize: int = 1024,
+        local_ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.local = TTLCache(
+            ttl=min(ttl, local_ttl or ttl), maxsize=maxsize, name=name
+        )
+        self._hits = CACHE_REQUESTS.labels(f"{name}_shared", "hit")
+        self._misses = CACHE_REQUESTS.labels(f"{name}_shared", "miss")
+        subscribe(name, self._drop_local)
+
+    def _shared_key(self, key: str) -> str:
+        return f"{SHARED_CACHE_PREFIX}:{self.name}:{key}"
+
+    def _drop_local(self, key: Optional[str]):
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING or _client is None:
+            return default if value is _MISSING else value
+        return self._get_shared(key, default)
+
+    async def get_async(self, key: str, default: Optional[Any] = None) -> Any:
+        """get() for the event loop; the Redis round trip runs in the threadpool"""
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING or _client is None:
+            return default if value is _MISSING else value
+        return await run_in_threadpool(self._get_shared, key, default)
+
+    def _get_shared(self, key: str, default: Optional[Any]) -> Any:
+        try:
+            payload = _client.get(self._shared_key(key))
+        except redis.RedisError as e:
+            _shared_tier_failed(e)
+            return default
+        if payload is None:
+            self._misses.inc()
+            return default
+        try:
+            value = pickle.loads(payload)
+        except Exception as e:
+            # Written by a different version of the code; treat as a miss
+            logger.warning(f"Dropping unreadable {self.name} cache entry {key}: {e}")
+            self._misses.inc()
+            return default
+        self._hits.inc()
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.local.set(key, value, ttl=min(ttl, self.local.ttl))
+        if _client is not None:
+            self._set_shared(key, value, ttl)
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[float] = None):
+        """set() for the event loop; the Redis round trip runs in the threadpool"""
+        ttl = self.ttl if ttl is None else ttl
+        self.local.set(key, value, ttl=min(ttl, self.local.ttl))
+        if _client is not None:
+            await run_in_threadpool(self._set_shared, key, value, ttl)
+
+    def _set_shared(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            _client.set(
+                self._shared_key(key), pickle.dumps(value), ex=max(1, math.ceil(ttl))
+            )
+        except redis.RedisError as e:
+            _shared_tier_failed(e)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if _client is not None:
+            try:
+                _client.delete(self._shared_key(key))
+            except redis.RedisError as e:
+                _shared_tier_failed(e)
+        publish(self.name, key)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if _client is not None:
+            try:
+                keys = list(_client.scan_iter(match=self._shared_key("*")))
+                if keys:
+                    _client.delete(*keys)
+            except redis.RedisError as e:
+                _shared_tier_failed(e)
+        publish(self.name)
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+
+class InvalidationListener:
+    """Per-worker subscriber applying other processes' invalidations to L1"""
+
+    def __init__(self):
+        self._pubsub = None
+        self._thread = None
+
+    def start(self):
+        # Called from each worker's startup; threads don't survive a fork
+        if _client is None or self._thread is not None:
+            return
+        self._pubsub = _client.pubsub(ignore_subscribe_messages=True)
+        try:
+            self._pubsub.subscribe(
+                **{INVALIDATION_CHANNEL: lambda message: _dispatch(message["data"])}
+            )
+        except redis.RedisError as e:
+            # Local entries still expire on their own TTL
+            _shared_tier_failed(e)
+            self._pubsub = None
+            return
+        self._thread = self._pubsub.run_in_thread(
+            sleep_time=0.25, daemon=True, exception_handler=self._on_error
+        )
+
+    def _on_error(self, e, pubsub, thread):
+        # Messages may have been lost while disconnected, so drop everything local
+        _shared_tier_failed(e)
+        for topic in list(_subscribers):
+            _dispatch(json.dumps({"topic": topic, "key": None}))
+        time.sleep(1)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+invalidation_listener = InvalidationListener()
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.requests import Request
+
+from .database import wrote_recently
+from .metrics import SINGLE_FLIGHT_REQUESTS
+
+# Identical GETs to these paths that arrive while one is running share its response
+SINGLE_FLIGHT_PATHS = [
+    re.compile(pattern)
+    for pattern in os.getenv(
+        "SINGLE_FLIGHT_PATHS", r"^/api/products$,^/api/products/\d+$"
+    ).split(",")
+    if pattern
+]
+# Followers stop waiting after this long and run the request themselves
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "5"))
+
+# Never replayed to other clients
+_PRIVATE_HEADERS = {b"set-cookie"}
+
+
+def flight_key(scope) -> tuple:
+    """Normalized path and query, plus whatever changes what a client may see"""
+    query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode())))
+    headers = dict(scope.get("headers") or [])
+    return (
+        scope["path"],
+        query,
+        headers.get(b"accept-encoding", b""),
+        # Clients pinned to the primary must not get a replica's answer
+        wrote_recently(Request(scope)),
+    )
+
+
+class SingleFlightMiddleware:
+    """Coalesces concurrent identical cacheable GETs into one computation
+
+    The first request (the leader) runs normally; identical requests arriving
+    before it finishes wait for its status, headers and body instead of
+    running their own queries. An exception in the leader is raised in every
+    waiter too.
+    """
+
+    def __init__(self, app, paths=SINGLE_FLIGHT_PATHS, timeout=SINGLE_FLIGHT_TIMEOUT):
+        self.app = app
+        self.paths = paths
+        self.timeout = timeout
+        self._inflight = {}
+
+    def _coalesces(self, scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and any(pattern.match(scope["path"]) for pattern in self.paths)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._coalesces(scope):
+            await self.app(scope, receive, send)
+            return
+
+        key = flight_key(scope)
+        flight = self._inflight.get(key)
+        if flight is not None:
+            await self._follow(flight, scope, receive, send)
+            return
+
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = flight
+        SINGLE_FLIGHT_REQUESTS.labels("leader").inc()
+        try:
+            result = await self._run(scope, receive)
+        except Exception as e:
+            flight.set_exception(e)
+            # Marks the exception retrieved when nobody was waiting for it
+            flight.exception()
+            raise
+        except BaseException:
+            # Leader was cancelled (client went away): waiters run on their own
+            flight.set_result(None)
+            raise
+        else:
+            flight.set_result(result)
+        finally:
+            del self._inflight[key]
+        await self._replay(result, send, role=b"leader")
+
+    async def _run(self, scope, receive) -> dict:
+        result = {"start": None, "body": [], "route": None}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                result["start"] = message
+            elif message["type"] == "http.response.body":
+                result["body"].append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        result["route"] = scope.get("route")
+        return result
+
+    async def _follow(self, flight, scope, receive, send):
+        try:
+            result = await asyncio.wait_for(asyncio.shield(flight), self.timeout)
+        except asyncio.TimeoutError:
+            result = None
+            SINGLE_FLIGHT_REQUESTS.labels("timeout").inc()
+        else:
+            SINGLE_FLIGHT_REQUESTS.labels("follower").inc()
+        if result is None:
+            await self.app(scope, receive, send)
+            return
+        # Lets outer middlewares label this request by route like the leader
+        if result["route"] is not None:
+            scope["route"] = result["route"]
+        await self._replay(result, send, role=b"follower")
+
+    async def _replay(self, result: dict, send, role: bytes):
+        start = result["start"]
+        headers = [
+            (name, value)
+            for name, value in start.get("headers", [])
+            if role == b"leader" or name.lower() not in _PRIVATE_HEADERS
+        ]
+        headers.append((b"x-single-flight", role))
+        await send({**start, "headers": headers})
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"".join(result["body"]),
+                "more_body": False,
+            }
+        )
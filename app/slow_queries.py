@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from .cache import TTLCache
+from .metrics import route_label
+from .querystats import current_query_stats, statement_shape
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.log")
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+# At most one EXPLAIN per statement shape within this many seconds
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+# EXPLAINs waiting or running at once; more are dropped, not queued
+SLOW_QUERY_EXPLAIN_BACKLOG = int(os.getenv("SLOW_QUERY_EXPLAIN_BACKLOG", "10"))
+
+# Most recent entries, shown on /admin/slow-queries
+recent_slow_queries = deque(maxlen=200)
+
+_file_logger = logging.getLogger("slow_queries.file")
+_file_logger.propagate = False
+_file_logger.setLevel(logging.INFO)
+_file_logger_lock = threading.Lock()
+_file_log_disabled = not SLOW_QUERY_LOG
+
+# A single side thread, so EXPLAIN never competes with request threads
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+_explain_slots = threading.BoundedSemaphore(SLOW_QUERY_EXPLAIN_BACKLOG)
+# database URL -> one-connection engine, so EXPLAIN never takes a request's
+# pooled connection; only touched from the explain thread
+_explain_engines = {}
+# Shapes explained within the interval; bounded, as shapes can be unbounded
+_explained_shapes = TTLCache(
+    ttl=SLOW_QUERY_EXPLAIN_INTERVAL, maxsize=1000, name="explained_shapes"
+)
+_explain_lock = threading.Lock()
+
+
+def parameter_shape(parameters):
+    """Types of the bound parameters, never their values"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _file_log_ready() -> bool:
+    """Attach the file handler on the first write, not when the app is imported"""
+    global _file_log_disabled
+    if _file_logger.handlers:
+        return True
+    with _file_logger_lock:
+        if _file_log_disabled:
+            return False
+        if not _file_logger.handlers:
+            try:
+                Path(SLOW_QUERY_LOG).parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG, maxBytes=5 * 1024 * 1024, backupCount=5
+                )
+            except OSError as e:
+                logger.warning(f"Slow query log {SLOW_QUERY_LOG} unavailable: {e}")
+                _file_log_disabled = True
+                return False
+            _file_logger.addHandler(handler)
+    return True
+
+
+def _write(entry: dict):
+    if _file_log_ready():
+        _file_logger.info(json.dumps(entry, default=str))
+
+
+def _should_explain(conn, shape: str, executemany: bool) -> bool:
+    # EXPLAIN reuses the driver-level SQL, so only sync Postgres engines qualify
+    if not SLOW_QUERY_EXPLAIN or executemany:
+        return False
+    if conn.dialect.name != "postgresql" or conn.dialect.is_async:
+        return False
+    with _explain_lock:
+        if _explained_shapes.get(shape) is not None:
+            return False
+        _explained_shapes.set(shape, True)
+    return True
+
+
+def _explain_engine(url):
+    if url not in _explain_engines:
+        _explain_engines[url] = create_engine(
+            url, pool_size=1, max_overflow=0, pool_pre_ping=True
+        )
+    return _explain_engines[url]
+
+
+def _explain(url, statement, parameters, entry: dict):
+    try:
+        with _explain_engine(url).connect() as side_connection:
+            rows = side_connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE off) {statement}", parameters
+            ).all()
+        entry["plan"] = "\n".join(row[0] for row in rows)
+        _write({"type": "explain", "shape": entry["shape"], "plan": entry["plan"]})
+    except Exception as e:
+        logger.warning(f"EXPLAIN failed for slow query: {e}")
+    finally:
+        _explain_slots.release()
+
+
+def _submit_explain(conn, shape: str, statement, parameters, entry: dict):
+    if not _explain_slots.acquire(blocking=False):
+        # Backed up (e.g. the database is struggling); let the shape retry later
+        _explained_shapes.delete(shape)
+        logger.info(f"EXPLAIN backlog full, skipped: {shape[:200]}")
+        return
+    _explain_executor.submit(_explain, conn.engine.url, statement, parameters, entry)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started"]) * 1000
+    if elapsed_ms < SLOW_QUERY_MS or statement.lstrip().upper().startswith("EXPLAIN"):
+        return
+
+    stats = current_query_stats()
+    shape = statement_shape(statement)
+    entry = {
+        "type": "slow_query",
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(elapsed_ms, 2),
+        "route": route_label(stats.scope) if stats and stats.scope else None,
+        "shape": shape,
+        "parameters": None if executemany else parameter_shape(parameters),
+        "plan": None,
+    }
+    recent_slow_queries.appendleft(entry)
+    _write(entry)
+    logger.warning(
+        f"Slow query ({elapsed_ms:.0f} ms) on {entry['route'] or 'no request'}: "
+        f"{shape[:200]}"
+    )
+
+    if _should_explain(conn, shape, executemany):
+        _submit_explain(conn, shape, statement, parameters, entry)
@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from .cache import TTLCache
+from .catalog import catalog_version
+
+TEMPLATE_DIR = "templates"
+# Compiled templates are kept here so fresh workers skip the Jinja compiler
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR", ".jinja_cache")
+# Stat template files on every render; turn off in production images
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "true").lower() == "true"
+
+# Other workers' writes don't bump this process's catalog version, so rendered
+# fragments also expire after a short TTL
+FRAGMENT_CACHE_TTL = float(os.getenv("FRAGMENT_CACHE_TTL", "60"))
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "512"))
+
+fragment_cache = TTLCache(
+    ttl=FRAGMENT_CACHE_TTL, maxsize=FRAGMENT_CACHE_SIZE, name="fragments"
+)
+
+
+class FragmentCacheExtension(Extension):
+    """`{% cache "name", key, ... %}...{% endcache %}` keyed by catalog version
+
+    The block must only depend on the values named in its key.
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_cached_fragment", [nodes.List(key)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cached_fragment(self, key, caller):
+        cache_key = (catalog_version(), *key)
+        fragment = fragment_cache.get(cache_key)
+        if fragment is None:
+            fragment = caller()
+            fragment_cache.set(cache_key, fragment)
+        return fragment
+
+
+def _create_templates() -> Jinja2Templates:
+    Path(TEMPLATE_BYTECODE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    templates = Jinja2Templates(
+        directory=TEMPLATE_DIR,
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR),
+        auto_reload=TEMPLATE_AUTO_RELOAD,
+        extensions=[FragmentCacheExtension],
+    )
+    templates.env.globals.update(min=min, max=max)
+    return templates
+
+
+templates = _create_templates()
+
+
+def precompile_templates() -> int:
+    """Compile every template up front; returns how many were loaded"""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets, e.g. one per client IP or username"""
+
+    def __init__(self, capacity: float, per_minute: float, maxsize: int = 10000):
+        # A bucket that never refills would lock a key out for good
+        if per_minute <= 0 or capacity < 1:
+            raise ValueError(
+                f"Token bucket needs per_minute > 0 and capacity >= 1, "
+                f"got {per_minute} and {capacity}"
+            )
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take one token; returns 0 when allowed, else seconds until one frees up"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.capacity, now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            tokens, updated_at = bucket
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def reset(self, key: Hashable):
+        with self._lock:
+            self._buckets.pop(key, None)
@@ -0,0 +1,97 @@
+import os
+from typing import Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .main import User
+from .shared_cache import TwoTierCache
+
+# How long a verified user stays cached before the users table is hit again
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+# Per-worker copies are re-read from the shared tier at least this often
+USER_CACHE_LOCAL_TTL = float(os.getenv("USER_CACHE_LOCAL_TTL", "10"))
+
+# Carry id/is_active in the JWT so hot paths can skip the DB entirely.
+# Deactivation then only takes effect for those paths once the token expires.
+TOKEN_USER_CLAIMS = os.getenv("TOKEN_USER_CLAIMS", "false").lower() == "true"
+
+user_cache = TwoTierCache(
+    "users", ttl=USER_CACHE_TTL, maxsize=USER_CACHE_SIZE, local_ttl=USER_CACHE_LOCAL_TTL
+)
+
+
+def _snapshot(user: User) -> User:
+    """Detached copy of a user that is safe to share between requests"""
+    return User(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        is_active=user.is_active,
+        created_at=user.created_at,
+    )
+
+
+def load_user(db: Session, username: str) -> Optional[User]:
+    """Look up a user by username, going to the database only on a cache miss"""
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    db_user = db.query(User).filter(User.username == username).first()
+    return _remember(db_user)
+
+
+async def load_user_async(db: AsyncSession, username: str) -> Optional[User]:
+    """Async variant of load_user; Redis is never called on the event loop"""
+    user = await user_cache.get_async(username)
+    if user is not None:
+        return user
+
+    result = await db.execute(select(User).where(User.username == username))
+    db_user = result.scalars().first()
+    if db_user is None:
+        return None
+    user = _snapshot(db_user)
+    await user_cache.set_async(user.username, user)
+    return user
+
+
+def _remember(db_user: Optional[User]) -> Optional[User]:
+    if db_user is None:
+        return None
+    user = _snapshot(db_user)
+    user_cache.set(user.username, user)
+    return user
+
+
+def invalidate_user(username: str):
+    user_cache.delete(username)
+
+
+def token_claims(user: User) -> dict:
+    """JWT payload for a user, including minimal claims when enabled"""
+    claims = {"sub": user.username}
+    if TOKEN_USER_CLAIMS:
+        claims.update({"uid": user.id, "active": int(user.is_active or 0)})
+    return claims
+
+
+def user_from_claims(payload: dict) -> Optional[User]:
+    """Build a principal straight from token claims, or None if they are absent"""
+    if "uid" not in payload or "active" not in payload:
+        return None
+    return User(
+        id=payload["uid"], username=payload.get("sub"), is_active=payload["active"]
+    )
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.username)
+    # A rename must also drop the entry cached under the old username
+    for old_username in inspect(target).attrs.username.history.deleted:
+        invalidate_user(old_username)
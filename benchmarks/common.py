@@ -0,0 +1,40 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import statistics
+
+# Shared between the catalog generator and the load test
+LOADTEST_USER = "loadtest"
+LOADTEST_PASSWORD = "loadtest-password"
+IMAGE_FILES = 50
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies_ms, elapsed_seconds=None):
+    """Latency percentiles (and throughput when elapsed time is known)"""
+    summary = {"count": len(latencies_ms)}
+    if latencies_ms:
+        summary["mean_ms"] = statistics.mean(latencies_ms)
+        for pct in (50, 95, 99):
+            summary[f"p{pct}_ms"] = percentile(latencies_ms, pct)
+    if elapsed_seconds:
+        summary["rps"] = len(latencies_ms) / elapsed_seconds
+    return summary
+
+
+def print_summary(label, summary):
+    print(f"\n📊 {label}")
+    print(f"   requests: {summary['count']}")
+    if "rps" in summary:
+        print(f"   throughput: {summary['rps']:.1f} req/s")
+    if "mean_ms" in summary:
+        print(f"   mean: {summary['mean_ms']:.1f} ms")
+        for pct in (50, 95, 99):
+            print(f"   p{pct}: {summary[f'p{pct}_ms']:.1f} ms")
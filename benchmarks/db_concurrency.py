@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for DB-backed endpoints: throughput and tail latency
+
+Run it once against a server on the sync session path and once against the
+async path (e.g. two checkouts on different ports), then compare the output:
+    python benchmarks/db_concurrency.py --concurrency 64 --json async.json
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from common import print_summary, summarize
+
+ENDPOINTS = [
+    "/api/categories",
+    "/api/categories/1",
+    "/api/products?limit=20",
+    "/api/images/list/products?limit=20",
+]
+
+
+def hammer(base_url, path, headers, stop, latencies, errors):
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}", headers=headers)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except requests.RequestException:
+            errors.append("connection")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def run_endpoint(base_url, path, headers, concurrency, duration):
+    stop = threading.Event()
+    latencies = []
+    errors = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(hammer, base_url, path, headers, stop, latencies, errors)
+        time.sleep(duration)
+        stop.set()
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary["errors"] = len(errors)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--token", help="Bearer token for authenticated endpoints")
+    parser.add_argument("--json", help="Write results to this file for diffing")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    results = {}
+    for path in ENDPOINTS:
+        summary = run_endpoint(
+            args.base_url, path, headers, args.concurrency, args.duration
+        )
+        results[path] = summary
+        print_summary(f"{path} @ {args.concurrency} concurrent", summary)
+        print(f"   errors: {summary['errors']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic catalog (products, categories, images) for load tests
+
+Rows are inserted in bulk batches straight through SQLAlchemy Core; a small
+pool of real image files is written to uploads/products so image serving
+can be exercised too. The same --seed always produces the same catalog.
+
+    python benchmarks/generate_catalog.py --products 100000 --reset
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(".")
+
+from PIL import Image as PILImage
+from sqlalchemy import insert, text
+
+from app.main import Base, Category, Image, Product, User, engine
+from app.passwords import pwd_context
+from common import IMAGE_FILES, LOADTEST_PASSWORD, LOADTEST_USER
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BATCH_SIZE = 5_000
+
+CATEGORY_NAMES = [
+    "Starter Kit",
+    "Pod",
+    "Device",
+    "Accessories",
+    "E-Liquid",
+    "Coil",
+    "Tank",
+    "Battery",
+    "Charger",
+    "Game Theme",
+]
+ADJECTIVES = ["Classic", "Ice", "Pro", "Mini", "Max", "Ultra", "Lite", "Plus"]
+FLAVOURS = ["Mint", "Grape", "Lychee", "Cola", "Mango", "Berry", "Peach", "Melon"]
+
+
+def write_image_files(upload_dir: Path, rng: random.Random):
+    """A fixed set of real JPEGs (and thumbnails) the image rows point at"""
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    filenames = []
+    for index in range(IMAGE_FILES):
+        filename = f"synthetic_{index:03d}.jpg"
+        color = tuple(rng.randrange(256) for _ in range(3))
+        image = PILImage.new("RGB", (800, 800), color)
+        image.save(upload_dir / filename, "JPEG", quality=85)
+        image.resize((300, 300)).save(upload_dir / f"thumb_{filename}", "JPEG")
+        filenames.append(filename)
+    return filenames
+
+
+def ensure_loadtest_user(connection) -> int:
+    user_id = connection.execute(
+        text("SELECT id FROM users WHERE username = :username"),
+        {"username": LOADTEST_USER},
+    ).scalar()
+    if user_id is not None:
+        return user_id
+    return connection.execute(
+        insert(User).returning(User.id),
+        {
+            "username": LOADTEST_USER,
+            "email": "loadtest@example.com",
+            "hashed_password": pwd_context.hash(LOADTEST_PASSWORD),
+            "is_active": 1,
+        },
+    ).scalar()
+
+
+def product_rows(start: int, count: int, rng: random.Random):
+    for number in range(start, start + count):
+        flavour = rng.choice(FLAVOURS)
+        yield {
+            "name": f"{rng.choice(ADJECTIVES)} {flavour} #{number}",
+            "description": f"Synthetic product {number} with {flavour.lower()} flavour",
+            "price": round(rng.uniform(5, 150), 2),
+            "category": rng.choice(CATEGORY_NAMES),
+        }
+
+
+def generate(total_products: int, images_per_product: int, seed: int, reset: bool):
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+    image_files = write_image_files(Path("uploads") / "products", rng)
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if reset:
+            connection.execute(Image.__table__.delete())
+            connection.execute(Product.__table__.delete())
+            connection.execute(Category.__table__.delete())
+        existing = set(
+            connection.execute(text("SELECT name FROM categories")).scalars()
+        )
+        new_categories = [
+            {"name": name, "description": f"Synthetic {name} category"}
+            for name in CATEGORY_NAMES
+            if name not in existing
+        ]
+        if new_categories:
+            connection.execute(insert(Category), new_categories)
+        user_id = ensure_loadtest_user(connection)
+
+    inserted = 0
+    while inserted < total_products:
+        count = min(BATCH_SIZE, total_products - inserted)
+        # One transaction per batch keeps locks and WAL bursts short
+        with engine.begin() as connection:
+            product_ids = connection.execute(
+                insert(Product).returning(Product.id),
+                list(product_rows(inserted, count, rng)),
+            ).scalars().all()
+            image_rows = [
+                {
+                    "filename": f"p{product_id}_{position}_{rng.choice(image_files)}",
+                    "original_filename": "synthetic.jpg",
+                    "file_path": f"uploads/products/{rng.choice(image_files)}",
+                    "thumbnail_path": None,
+                    "file_size": 50_000,
+                    "mime_type": "image/jpeg",
+                    "width": 800,
+                    "height": 800,
+                    "entity_type": "products",
+                    "entity_id": product_id,
+                    "is_active": True,
+                    "uploaded_by": user_id,
+                }
+                for product_id in product_ids
+                for position in range(images_per_product)
+            ]
+            if image_rows:
+                connection.execute(insert(Image), image_rows)
+        inserted += count
+        rate = inserted / (time.perf_counter() - started)
+        print(f"   {inserted}/{total_products} products ({rate:.0f}/s)", end="\r")
+
+    if engine.dialect.name == "postgresql":
+        # Fresh planner statistics, so estimated counts are right immediately
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            for table in ("products", "images", "categories"):
+                connection.execute(text(f"ANALYZE {table}"))
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Generated {total_products} products in {elapsed:.1f}s")
+    print(f"👤 Load-test login: {LOADTEST_USER} / {LOADTEST_PASSWORD}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--size",
+        choices=sorted(SIZES),
+        help="Preset catalog size (overrides --products)",
+    )
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--images-per-product", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reset", action="store_true", help="Delete existing catalog rows first"
+    )
+    args = parser.parse_args()
+
+    total = SIZES[args.size] if args.size else args.products
+    generate(total, args.images_per_product, args.seed, args.reset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the image processing primitives in app/routers/images.py
+
+Runs validate_image_content, optimize_image and create_thumbnail over a fixed,
+generated corpus. Each case is timed in several rounds, interleaved with the
+other cases, and the fastest round's median is kept, so a burst of noise on
+the machine has to last every round to show up as a regression.
+
+    python benchmarks/image_primitives.py --json baseline.json
+    python benchmarks/image_primitives.py --baseline baseline.json
+
+With --baseline the exit status is 1 when any case regresses past the
+threshold. Cases faster than MIN_GATED_MS are reported but never fail the run;
+at that scale timer and scheduler noise outweighs the code under test.
+"""
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+
+sys.path.append(".")
+
+from PIL import Image
+
+# app.main defines the models the rest of the app imports, so it loads first
+import app.main  # noqa: F401
+from app.routers.images import create_thumbnail, optimize_image, validate_image_content
+
+EXIF_ORIENTATION = 0x0112
+MIN_GATED_MS = 1.0
+
+
+def _encode(image, fmt, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def _gradient(size, mode="RGB"):
+    """Deterministic, non-uniform content so encoders do real work"""
+    base = Image.linear_gradient("L").resize(size)
+    other = base.transpose(Image.Transpose.ROTATE_90).resize(size)
+    channels = [base, other, Image.new("L", size, 128)]
+    if mode == "RGBA":
+        channels.append(base.point(lambda value: 255 - value // 2))
+    return Image.merge(mode, channels)
+
+
+def build_corpus():
+    """name -> (encoded bytes, filename)"""
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6  # rotate 90 CW on display
+    palette = _gradient((800, 600)).convert("P", palette=Image.Palette.ADAPTIVE)
+    return {
+        "jpeg_1600x1200": (
+            _encode(_gradient((1600, 1200)), "JPEG", quality=90),
+            "photo.jpg",
+        ),
+        "png_rgba_1200x1200": (
+            _encode(_gradient((1200, 1200), "RGBA"), "PNG"),
+            "alpha.png",
+        ),
+        "gif_palette_800x600": (_encode(palette, "GIF"), "palette.gif"),
+        "jpeg_exif_rotated_1600x1200": (
+            _encode(_gradient((1600, 1200)), "JPEG", exif=exif.tobytes()),
+            "rotated.jpg",
+        ),
+        "jpeg_large_4000x3000": (
+            _encode(_gradient((4000, 3000)), "JPEG", quality=90),
+            "large.jpg",
+        ),
+        "png_tiny_16x16": (_encode(_gradient((16, 16)), "PNG"), "tiny.png"),
+    }
+
+
+def cases():
+    """key -> (function, setup returning fresh arguments)"""
+    cases = {}
+    for name, (data, filename) in build_corpus().items():
+        decoded = Image.open(io.BytesIO(data))
+        decoded.load()
+        cases[f"validate_image_content[{name}]"] = (
+            validate_image_content,
+            lambda data=data, filename=filename: (data, filename),
+        )
+        cases[f"optimize_image[{name}]"] = (
+            optimize_image,
+            lambda decoded=decoded: (decoded.copy(),),
+        )
+        cases[f"create_thumbnail[{name}]"] = (
+            create_thumbnail,
+            lambda decoded=decoded: (decoded.copy(),),
+        )
+    return cases
+
+
+def median_seconds(fn, setup, iterations):
+    timings = []
+    for _ in range(iterations):
+        args = setup()
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run(iterations, rounds):
+    benchmarks = cases()
+    medians = {key: [] for key in benchmarks}
+    for _ in range(rounds):
+        for key, (fn, setup) in benchmarks.items():
+            medians[key].append(median_seconds(fn, setup, iterations))
+
+    results = {}
+    for key, values in medians.items():
+        best, worst = min(values), max(values)
+        results[key] = {
+            "median_ms": best * 1000,
+            "spread_pct": (worst / best - 1) * 100 if best else 0.0,
+        }
+        print(
+            f"   {key}: {results[key]['median_ms']:.2f} ms median "
+            f"(rounds within {results[key]['spread_pct']:.0f}%)"
+        )
+    return results
+
+
+def regressions(results, baseline, threshold):
+    failures = []
+    for key, current in results.items():
+        before = baseline.get(key, {}).get("median_ms")
+        if not before or before < MIN_GATED_MS:
+            continue
+        if current["median_ms"] > before * (1 + threshold / 100):
+            change = (current["median_ms"] / before - 1) * 100
+            failures.append(f"{key}: +{change:.1f}%")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--iterations", type=int, default=10, help="Calls per case per round"
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=20, help="Allowed regression in percent"
+    )
+    args = parser.parse_args()
+
+    print("📊 Image primitive benchmarks")
+    results = run(args.iterations, args.rounds)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f), args.threshold)
+        if failures:
+            print(f"\n❌ Regressions beyond {args.threshold}%:")
+            for failure in failures:
+                print(f"   • {failure}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Scripted load test against a local uvicorn, with a diffable JSON report
+
+Generate a catalog first (benchmarks/generate_catalog.py), then e.g.:
+    python benchmarks/load_test.py --start-server --mix browse --json run.json
+    python benchmarks/load_test.py --mix browse --compare run.json
+"""
+import argparse
+import io
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from common import (
+    IMAGE_FILES,
+    LOADTEST_PASSWORD,
+    LOADTEST_USER,
+    print_summary,
+    summarize,
+)
+from PIL import Image
+
+# Relative weights of each scripted action per mix
+MIXES = {
+    "browse": {
+        "list_products": 40,
+        "product_detail": 35,
+        "categories": 15,
+        "serve_image": 10,
+    },
+    "admin": {
+        "list_products": 30,
+        "product_detail": 20,
+        "categories": 10,
+        "serve_image": 20,
+        "upload_image": 20,
+    },
+    "images": {"serve_image": 80, "upload_image": 20},
+}
+
+
+class Scenario:
+    def __init__(self, base_url, product_count, product_ids, token, seed):
+        self.base_url = base_url
+        self.product_count = product_count
+        self.product_ids = product_ids
+        self.token = token
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        upload = io.BytesIO()
+        Image.new("RGB", (1600, 1200), (200, 120, 40)).save(upload, "JPEG")
+        self.upload_bytes = upload.getvalue()
+
+    def list_products(self):
+        skip = self.rng.randrange(max(1, self.product_count - 20))
+        return self.session.get(
+            f"{self.base_url}/api/products", params={"skip": skip, "limit": 20}
+        )
+
+    def product_detail(self):
+        product_id = self.rng.choice(self.product_ids)
+        return self.session.get(f"{self.base_url}/api/products/{product_id}")
+
+    def categories(self):
+        return self.session.get(f"{self.base_url}/api/categories")
+
+    def serve_image(self):
+        filename = f"synthetic_{self.rng.randrange(IMAGE_FILES):03d}.jpg"
+        return self.session.get(f"{self.base_url}/api/images/products/{filename}")
+
+    def upload_image(self):
+        return self.session.post(
+            f"{self.base_url}/api/images/upload/products",
+            files={"file": ("load.jpg", self.upload_bytes, "image/jpeg")},
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+
+
+def login(base_url):
+    response = requests.post(
+        f"{base_url}/api/auth/login",
+        json={"username": LOADTEST_USER, "password": LOADTEST_PASSWORD},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def sample_product_ids(base_url, product_count, seed, pages=20, page_size=100):
+    """Real ids from a spread of pages; ids needn't start at 1 (sequences keep
+    counting after --reset)"""
+    rng = random.Random(seed)
+    ids = set()
+    for _ in range(pages):
+        skip = rng.randrange(max(1, product_count - page_size))
+        response = requests.get(
+            f"{base_url}/api/products", params={"skip": skip, "limit": page_size}
+        )
+        response.raise_for_status()
+        ids.update(product["id"] for product in response.json())
+    if not ids:
+        raise RuntimeError("No products found; run benchmarks/generate_catalog.py")
+    return sorted(ids)
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health").ok:
+                return server
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not become healthy")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(args, token, product_ids):
+    weights = MIXES[args.mix]
+    actions = list(weights)
+    results = {action: [] for action in actions}
+    errors = {action: 0 for action in actions}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker(worker_id):
+        scenario = Scenario(
+            args.base_url, args.products, product_ids, token, args.seed + worker_id
+        )
+        while not stop.is_set():
+            action = scenario.rng.choices(actions, [weights[a] for a in actions])[0]
+            started = time.perf_counter()
+            try:
+                ok = getattr(scenario, action)().status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                results[action].append(elapsed_ms)
+                errors[action] += 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for worker_id in range(args.concurrency):
+            pool.submit(worker, worker_id)
+        time.sleep(args.duration)
+        stop.set()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "revision": git_revision(),
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "actions": {},
+    }
+    for action in actions:
+        summary = summarize(results[action], elapsed)
+        summary["errors"] = errors[action]
+        report["actions"][action] = summary
+    all_latencies = [ms for latencies in results.values() for ms in latencies]
+    report["overall"] = summarize(all_latencies, elapsed)
+    report["overall"]["errors"] = sum(errors.values())
+    return report
+
+
+def print_comparison(report, baseline):
+    print(f"\n🔍 Compared with {baseline.get('revision') or 'baseline'}")
+    rows = {**report["actions"], "overall": report["overall"]}
+    previous = {**baseline["actions"], "overall": baseline["overall"]}
+    for action, summary in rows.items():
+        before = previous.get(action)
+        if not before:
+            continue
+        deltas = []
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            if before.get(key):
+                change = (summary.get(key, 0) - before[key]) / before[key] * 100
+                deltas.append(f"{key} {change:+.1f}%")
+        print(f"   {action}: {', '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="browse")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-server", action="store_true")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        server = start_server(args.port)
+        args.base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        token = login(args.base_url) if "upload_image" in MIXES[args.mix] else None
+        product_ids = sample_product_ids(args.base_url, args.products, args.seed)
+        report = run(args, token, product_ids)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    for action, summary in report["actions"].items():
+        print_summary(action, summary)
+        print(f"   errors: {summary['errors']}")
+    print_summary("overall", report["overall"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Measure catalog read latency while the API is flooded with login attempts
+
+Run against a local server, e.g. `uvicorn app.main:app`, then:
+    python benchmarks/login_flood.py --duration 20 --flood-workers 32
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from common import print_summary, summarize
+
+
+def flood_logins(base_url, stop, counts, worker_id):
+    session = requests.Session()
+    attempt = 0
+    while not stop.is_set():
+        attempt += 1
+        response = session.post(
+            f"{base_url}/api/auth/login",
+            json={"username": f"flood-{worker_id}-{attempt}", "password": "wrong"},
+            # Spreads source IPs only if uvicorn runs with --forwarded-allow-ips
+            headers={"X-Forwarded-For": f"10.0.{worker_id}.{attempt % 250}"},
+        )
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+def read_catalog(base_url, stop, latencies):
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f"{base_url}/api/products", params={"limit": 20})
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def run_phase(base_url, duration, flood_workers, read_workers):
+    stop = threading.Event()
+    latencies = []
+    counts = {}
+    with ThreadPoolExecutor(max_workers=flood_workers + read_workers) as pool:
+        for worker_id in range(flood_workers):
+            pool.submit(flood_logins, base_url, stop, counts, worker_id)
+        for _ in range(read_workers):
+            pool.submit(read_catalog, base_url, stop, latencies)
+        time.sleep(duration)
+        stop.set()
+    return latencies, counts
+
+
+def report(label, latencies, counts):
+    print_summary(label, summarize(latencies))
+    if counts:
+        summary = ", ".join(f"{code}={n}" for code, n in sorted(counts.items()))
+        print(f"   login responses: {summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--flood-workers", type=int, default=32)
+    parser.add_argument("--read-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    latencies, counts = run_phase(args.base_url, args.duration, 0, args.read_workers)
+    report("Baseline (no login traffic)", latencies, counts)
+
+    latencies, counts = run_phase(
+        args.base_url, args.duration, args.flood_workers, args.read_workers
+    )
+    report(f"During login flood ({args.flood_workers} workers)", latencies, counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,5 +25,15 @@ else
 fi
 
 # Start the application
+if [ "$SERVER_MODE" = "production" ]; then
+  # Multi-worker gunicorn; worker count and recycling are set in gunicorn.conf.py
+  export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+  echo "Starting the application (production, gunicorn)..."
+  exec gunicorn app.main:app -c gunicorn.conf.py
+fi
+
 echo "Starting the application..."
 exec python -m uvicorn app.main:app --host 0.0.0.0 --port 8000
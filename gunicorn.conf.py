@@ -0,0 +1,107 @@
+"""
+Production server settings: gunicorn managing uvicorn workers
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+The app is imported once in the master and forked into every worker.
+Graceful restarts:
+  * kill -HUP <master>   re-forks workers one by one (config changes; with
+                          preloading the code itself is not re-imported)
+  * kill -USR2 <master>  starts a new master on new code; then send WINCH and
+                          QUIT to the old one once the new workers are up
+  * kill -TERM <master>  stops accepting, drains in-flight requests and
+                          background image jobs for up to graceful_timeout
+"""
+import math
+import os
+from pathlib import Path
+
+# Each worker opens its own DB pool, so Postgres sees up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+WORKER_MEMORY_MB = int(os.getenv("WORKER_MEMORY_MB", "256"))
+
+
+def _cgroup_cpu_limit():
+    """CPU quota of this container in cores, or None when unlimited"""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _cgroup_memory_limit():
+    """Memory limit of this container in bytes, or None when unlimited"""
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        try:
+            value = Path(path).read_text().strip()
+        except OSError:
+            continue
+        # cgroup v1 reports "unlimited" as a huge number
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+    return None
+
+
+def worker_count():
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.getenv("WEB_CONCURRENCY")))
+    # Async workers keep a core busy on their own, so one per core
+    cpus = len(os.sched_getaffinity(0))
+    quota = _cgroup_cpu_limit()
+    if quota:
+        cpus = min(cpus, math.ceil(quota))
+    workers = max(1, cpus)
+    memory = _cgroup_memory_limit()
+    if memory:
+        workers = min(workers, max(1, memory // (WORKER_MEMORY_MB * 1024 * 1024)))
+    return workers
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Recycle workers to bound slow memory growth; jitter avoids all restarting at once
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "500"))
+
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+accesslog = "-"
+
+
+def when_ready(server):
+    server.log.info(f"Serving with {workers} workers")
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Drop gauges the preloaded app set in the master; workers set their own
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def post_fork(server, worker):
+    from app.database import reset_after_fork
+
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
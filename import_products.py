@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Import products from a CSV or NDJSON feed, upserting by SKU
+(or by id for rows without a matching SKU, as in /api/products/export output)
+
+The file is read as a stream and committed in batches, so API readers are
+never held up by one long transaction. Progress is saved to a checkpoint
+after every commit; running the same command again resumes from there.
+
+    python import_products.py supplier_feed.csv --dry-run
+    python import_products.py supplier_feed.csv
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(".")
+
+# app.main defines the models the rest of the app imports, so it loads first
+import app.main  # noqa: F401
+from app.catalog_import import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    format_for,
+    import_products,
+    parse_rows,
+)
+
+
+def _source_id(path: str) -> dict:
+    # A checkpoint only applies to the exact file it was written for
+    stat = os.stat(path)
+    return {
+        "source": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+
+
+def load_checkpoint(checkpoint: str, path: str) -> int:
+    try:
+        with open(checkpoint) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    source = {key: state.get(key) for key in ("source", "size", "mtime")}
+    if source != _source_id(path):
+        print(f"⚠️  Ignoring checkpoint {checkpoint}: it was written for another file")
+        return 0
+    return state["rows"]
+
+
+def save_checkpoint(checkpoint: str, path: str, rows: int):
+    temporary = f"{checkpoint}.tmp"
+    with open(temporary, "w") as f:
+        json.dump({**_source_id(path), "rows": rows}, f)
+    os.replace(temporary, checkpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format", choices=IMPORT_FORMATS, help="Defaults to the file extension"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report changes without writing"
+    )
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--checkpoint", help="Progress file (default: <path>.checkpoint)"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore any saved checkpoint"
+    )
+    args = parser.parse_args()
+
+    format = args.format or format_for(args.path)
+    if format is None:
+        parser.error("Can't tell the format from the file name, pass --format")
+    checkpoint = args.checkpoint or f"{args.path}.checkpoint"
+
+    resume_from = 0
+    if not args.restart and not args.dry_run:
+        resume_from = load_checkpoint(checkpoint, args.path)
+        if resume_from:
+            print(f"↪️  Resuming after row {resume_from}")
+
+    def on_commit(rows: int):
+        save_checkpoint(checkpoint, args.path, rows)
+        print(f"   … {rows} rows done", flush=True)
+
+    with open(args.path, encoding="utf-8-sig", newline="") as f:
+        report = import_products(
+            parse_rows(f, format),
+            dry_run=args.dry_run,
+            resume_from=resume_from,
+            batch_size=args.batch_size,
+            on_commit=on_commit,
+        ).as_dict()
+
+    if not args.dry_run and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    print("🔍 Dry run, nothing was written" if args.dry_run else "✅ Import finished")
+    print(f"📊 Rows read: {report['rows'] - resume_from}")
+    for status in ("created", "updated", "unchanged", "errors"):
+        print(f"   • {status}: {report[status]}")
+    for change in report.get("changes", []):
+        print(f"   {change['status']} #{change['index']}: {change['changes']}")
+    for error in report["error_rows"]:
+        print(f"   ❌ row {error['index']}: {error['errors']}")
+
+
+if __name__ == "__main__":
+    main()
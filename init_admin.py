@@ -6,13 +6,14 @@ import sys
 import os
 sys.path.append('.')
 
-from app.main import engine, Base, get_password_hash, SessionLocal
+from app.main import engine, Base, get_password_hash, SessionLocal, upgrade_schema
 from app.main import User
 
 def init_admin_user():
     # Drop and recreate tables to add new columns
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
     
     # Create admin user
     db = SessionLocal()
@@ -21,23 +21,22 @@ base_url = "http://localhost:8000"
 
 print("Adding categories to database...")
 
-for category in categories:
-    try:
-        response = requests.post(
-            f"{base_url}/api/categories",
-            json=category,
-            headers={"Content-Type": "application/json"},
-        )
-
-        if response.status_code == 200:
-            print(f"✅ Added category: {category['name']}")
-        else:
-            print(
-                f"❌ Failed to add {category['name']}: {response.status_code} - {response.text}"
-            )
-
-    except Exception as e:
-        print(f"❌ Error adding {category['name']}: {e}")
+# One request; categories that already exist are updated instead of duplicated
+try:
+    response = requests.post(f"{base_url}/api/categories/bulk", json=categories)
+
+    if response.status_code == 200:
+        for result in response.json()["results"]:
+            name = categories[result["index"]]["name"]
+            if result["status"] == "error":
+                print(f"❌ Failed to add {name}: {result['errors']}")
+            else:
+                print(f"✅ {result['status'].capitalize()} category: {name}")
+    else:
+        print(f"❌ Failed to add categories: {response.status_code} - {response.text}")
+
+except Exception as e:
+    print(f"❌ Error adding categories: {e}")
 
 print("\nChecking categories...")
 try:
@@ -7,7 +7,9 @@ import sys
 
 sys.path.append(".")
 
+# app.main first: it defines the models app.catalog imports
 from app.main import Base, Product, SessionLocal, engine
+from app.catalog import delete_all
 
 
 def populate_products():
@@ -18,7 +20,7 @@ def populate_products():
 
     try:
         # Clear existing products
-        db.query(Product).delete()
+        delete_all(db, Product, "product")
 
         # Products based on the brand folders and descriptions
         products_data = [
@@ -0,0 +1,44 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Static, template and upload directories are resolved from the cwd
+os.chdir(ROOT)
+
+# The app reads its configuration at import time, so point it at a throwaway
+# SQLite database (unless DATABASE_URL names another) and in-process caching
+# before anything imports it
+TEST_DB_DIR = tempfile.mkdtemp(prefix="vape-cms-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{TEST_DB_DIR}/test.db")
+os.environ["REDIS_URL"] = ""
+
+
+def run_async(coro):
+    """asyncio.run that leaves no pooled async connections tied to its loop"""
+    from app.database import async_engine
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def db():
+    """Session on freshly created tables"""
+    from app.database import SessionLocal, engine
+    from app.main import Base
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        yield session
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from app.database import engine
+from app.main import Product, ProductCreate
+
+
+def _rows(count, **overrides):
+    return [
+        (
+            index,
+            ProductCreate(
+                sku=f"SKU-{index}", name="Pod", price=9.5, **overrides
+            ).model_dump(),
+        )
+        for index in range(count)
+    ]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+
+def test_upsert_is_set_based(db):
+    from app.bulk import upsert_products
+
+    with StatementCounter() as counter:
+        results = upsert_products(db, _rows(500))
+    db.commit()
+
+    # Existing-key lookup, one upsert and one catalog event insert
+    assert counter.count == 3
+    assert [result["status"] for result in results] == ["created"] * 500
+    assert len(set(result["id"] for result in results)) == 500
+
+
+def test_upsert_reports_created_and_updated(db):
+    from app.bulk import upsert_products
+
+    created = upsert_products(db, _rows(3))
+    db.commit()
+    results = upsert_products(
+        db, _rows(2, category="Pod") + [(7, _rows(8)[7][1])]
+    )
+    db.commit()
+
+    assert [(r["index"], r["status"]) for r in results] == [
+        (0, "updated"),
+        (1, "updated"),
+        (7, "created"),
+    ]
+    assert results[0]["id"] == created[0]["id"]
+    categories = db.execute(select(Product.sku, Product.category)).all()
+    assert ("SKU-0", "Pod") in categories
+    assert ("SKU-2", None) in categories
+
+
+def test_keyless_rows_are_inserted_in_order(db):
+    from app.bulk import upsert_products
+
+    items = [
+        (index, ProductCreate(name=f"Pod {index}", price=1).model_dump())
+        for index in range(3)
+    ]
+    results = upsert_products(db, items)
+    db.commit()
+
+    names = dict(db.execute(select(Product.id, Product.name)).all())
+    assert [names[result["id"]] for result in results] == ["Pod 0", "Pod 1", "Pod 2"]
+
+
+@pytest.mark.parametrize("path", ["/api/products/bulk", "/api/categories/bulk"])
+def test_bulk_endpoints_require_sign_in(db, path):
+    from app.auth import get_current_user
+    from app.main import app
+
+    with TestClient(app) as client:
+        rows = [{"sku": "A", "name": "Pod", "price": 1}]
+        assert client.post(path, json=rows).status_code == 401
+
+        app.dependency_overrides[get_current_user] = lambda: None
+        try:
+            response = client.post(path, json=rows)
+        finally:
+            app.dependency_overrides.pop(get_current_user)
+    assert response.status_code == 200
+
+
+def test_unsupported_dialect_is_named():
+    from app.bulk import _insert_for
+
+    mysql = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+    )
+    with pytest.raises(ValueError, match="mysql"):
+        _insert_for(mysql)
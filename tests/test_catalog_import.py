@@ -0,0 +1,106 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(db):
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def _import(text, format="csv", **kwargs):
+    from app.catalog_import import import_products, parse_rows
+
+    return import_products(parse_rows(io.StringIO(text), format), **kwargs).as_dict()
+
+
+def test_export_reimports_without_duplicates(client, db):
+    from app.main import Product
+
+    # Products from before SKUs existed
+    db.add_all(Product(name=f"Pod {i}", price=10 + i) for i in range(3))
+    db.commit()
+    exported = client.get(
+        "/api/products/export",
+        params={"format": "csv"},
+        headers={"Accept-Encoding": "identity"},
+    ).text
+
+    dry_run = _import(exported, dry_run=True)
+    assert (dry_run["created"], dry_run["unchanged"]) == (0, 3)
+
+    report = _import(exported.replace("Pod 1", "Pod One"))
+    assert (report["created"], report["updated"], report["unchanged"]) == (0, 1, 2)
+    db.expire_all()
+    assert sorted(p.name for p in db.query(Product)) == ["Pod 0", "Pod 2", "Pod One"]
+
+
+def test_unknown_id_is_an_error(db):
+    report = _import('{"id": 999, "name": "Ghost", "price": 1}\n', format="ndjson")
+    assert report["errors"] == 1
+    assert report["error_rows"][0]["index"] == 0
+
+
+def test_unknown_id_with_a_new_sku_is_created(db):
+    from app.main import Product
+
+    # e.g. an export from another environment, where ids differ
+    feed = '{"id": 999, "sku": "NEW", "name": "Pod", "price": 1}\n'
+    report = _import(feed, format="ndjson")
+    assert (report["created"], report["errors"]) == (1, 0)
+    assert db.query(Product.sku).one() == ("NEW",)
+
+
+def test_sku_rows_upsert_and_skip_unchanged(db):
+    from app.main import Product
+
+    feed = "sku,name,price\nA,Pod A,1\nB,Pod B,2\n"
+    assert _import(feed)["created"] == 2
+    report = _import(feed.replace("Pod B", "Pod Bee"))
+    assert (report["created"], report["updated"], report["unchanged"]) == (0, 1, 1)
+    assert db.query(Product).count() == 2
+
+
+@pytest.fixture
+def signed_in(client):
+    from app.auth import get_current_user
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: None
+    yield client
+    app.dependency_overrides.pop(get_current_user)
+
+
+def _upload(client, body: bytes, name="feed.csv"):
+    return client.post("/api/products/import", files={"file": (name, body)})
+
+
+def test_upload_that_is_not_utf8_is_rejected(signed_in):
+    response = _upload(signed_in, "sku,name,price\nA,Pôd,1\n".encode("latin-1"))
+    assert response.status_code == 400
+    assert response.json()["detail"]["resume_from"] == 0
+
+
+def test_database_failure_reports_where_to_resume(signed_in, monkeypatch):
+    import app.catalog_import as catalog_import
+    from sqlalchemy.exc import OperationalError
+
+    real_upsert = catalog_import.upsert_products
+    calls = []
+
+    def flaky_upsert(db, items):
+        calls.append(len(items))
+        if len(calls) > 1:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        return real_upsert(db, items)
+
+    monkeypatch.setattr(catalog_import, "upsert_products", flaky_upsert)
+    rows = "".join(f"SKU-{i},Pod {i},1\n" for i in range(1500))
+    response = _upload(signed_in, f"sku,name,price\n{rows}".encode())
+
+    assert response.status_code == 503
+    assert response.json()["detail"]["resume_from"] == catalog_import.IMPORT_BATCH_SIZE
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from conftest import run_async
+
+
+def _add_events(db, *ids):
+    from app.models.catalog_event import CatalogEvent
+
+    db.execute(
+        insert(CatalogEvent),
+        [
+            {
+                "id": event_id,
+                "entity_type": "product",
+                "entity_id": event_id,
+                "action": "updated",
+            }
+            for event_id in ids
+        ],
+    )
+    db.commit()
+
+
+def test_late_commit_below_last_id_is_delivered(db):
+    from app.changefeed import ChangeFeed, Subscription
+
+    feed = ChangeFeed()
+    feed.last_id = 0
+    subscription = Subscription()
+    feed.subscribers.add(subscription)
+
+    # Event 2's transaction is still open when 1 and 3 are dispatched
+    _add_events(db, 1, 3)
+    run_async(feed._dispatch_new_events())
+    assert feed.gaps.keys() == {2}
+
+    _add_events(db, 2)
+    run_async(feed._dispatch_new_events())
+
+    delivered = []
+    while not subscription.queue.empty():
+        delivered.append(subscription.queue.get_nowait()["id"])
+    assert delivered == [1, 3, 2]
+    assert not feed.gaps
+
+
+def test_gaps_expire(db, monkeypatch):
+    import app.changefeed as changefeed
+
+    feed = changefeed.ChangeFeed()
+    feed.last_id = 0
+    _add_events(db, 1, 4)
+    run_async(feed._dispatch_new_events())
+    assert feed.gaps.keys() == {2, 3}
+
+    monkeypatch.setattr(changefeed, "CHANGE_FEED_GAP_TIMEOUT", -1)
+    run_async(feed._dispatch_new_events())
+    assert not feed.gaps
+
+
+def test_expired_events_are_deleted_without_subscribers(db):
+    from app.changefeed import ChangeFeed
+    from app.models.catalog_event import CatalogEvent
+
+    _add_events(db, 2)
+    db.add(
+        CatalogEvent(
+            id=1,
+            entity_type="product",
+            entity_id=1,
+            action="updated",
+            created_at=datetime.now(timezone.utc) - timedelta(days=30),
+        )
+    )
+    db.commit()
+
+    feed = ChangeFeed()
+
+    async def run_for_a_moment():
+        feed.start_retention()
+        await asyncio.sleep(0.2)
+        await feed.stop()
+
+    run_async(run_for_a_moment())
+    db.expire_all()
+    assert [event.id for event in db.query(CatalogEvent)] == [2]
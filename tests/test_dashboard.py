@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import text
+
+# app.main defines the models the rest of the app imports, so it loads first
+from app.main import Product
+from app import dashboard
+
+
+def _add_products(db):
+    pods = [Product(name=f"Pod {n}", price=9.5, category="Pods") for n in range(6)]
+    liquids = [Product(name=f"Liquid {n}", price=5, category="Liquids") for n in range(3)]
+    db.add_all(pods + liquids + [Product(name="Mystery", price=1)])
+    db.commit()
+
+
+def test_summary_counts_by_category(db):
+    _add_products(db)
+    dashboard.dashboard_cache.clear()
+
+    summary = dashboard.dashboard_summary(db)
+
+    assert summary["products_count"] == 10
+    assert not summary["counts_are_estimates"]
+    assert summary["category_counts"] == [
+        {"category": "Pods", "count": 6},
+        {"category": "Liquids", "count": 3},
+        {"category": None, "count": 1},
+    ]
+
+
+def test_large_catalog_uses_planner_statistics(db, monkeypatch):
+    if db.bind.dialect.name != "postgresql":
+        pytest.skip("planner statistics are PostgreSQL only")
+    _add_products(db)
+    # Seen once each, so too rare for the planner's most-common list
+    db.add_all(
+        [Product(name=f"Solo {n}", price=1, category=f"Solo {n}") for n in range(5)]
+    )
+    db.commit()
+    db.execute(text("ANALYZE products"))
+    db.commit()
+    monkeypatch.setattr(dashboard, "ESTIMATED_COUNT_THRESHOLD", 1)
+    dashboard.dashboard_cache.clear()
+
+    summary = dashboard.dashboard_summary(db)
+
+    assert summary["counts_are_estimates"]
+    assert summary["products_count"] == 15
+    assert summary["category_counts"][0] == {"category": "Pods", "count": 6}
+    assert summary["category_counts"][-1] == {
+        "category": None,
+        "count": 5,
+        "other": True,
+    }
+    assert sum(row["count"] for row in summary["category_counts"]) == 15
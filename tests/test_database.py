@@ -0,0 +1,42 @@
+from app.database import _create_engine
+from conftest import TEST_DB_DIR
+
+
+def test_each_engine_counts_its_own_checkouts():
+    primary = _create_engine(f"sqlite:///{TEST_DB_DIR}/primary.db")
+    replica = _create_engine(f"sqlite:///{TEST_DB_DIR}/replica.db")
+    try:
+        for _ in range(3):
+            with primary.connect():
+                pass
+        with replica.connect():
+            pass
+
+        assert primary.pool.metrics.checkouts == 3
+        assert replica.pool.metrics.checkouts == 1
+
+        # dispose() replaces the pool but not its counters
+        primary.dispose()
+        with primary.connect():
+            pass
+        assert primary.pool.metrics.checkouts == 4
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+def test_pool_stats_count_the_async_pool():
+    from app import database
+
+    stats = database.pool_stats()
+    if database.async_engine.dialect.name == "sqlite":
+        # aiosqlite connections aren't pooled
+        assert stats["async_capacity"] == 0
+    else:
+        assert stats["async_capacity"] == (
+            database.DB_ASYNC_POOL_SIZE + database.DB_ASYNC_MAX_OVERFLOW
+        )
+    assert stats["capacity"] == (
+        database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW + stats["async_capacity"]
+    )
+    assert stats["capacity"] == database._pool_capacity()
@@ -0,0 +1,25 @@
+import pytest
+
+from app.main import app  # noqa: F401  (models load before the routers)
+from app.routers.export import accepts_gzip
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("", False),
+        ("gzip", True),
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, gzip;q=0.8", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.0, identity", False),
+        ("GZIP;Q=0.5", True),
+        ("deflate", False),
+        ("*", True),
+        ("*;q=0", False),
+        ("gzip;q=0, *", False),
+        ("gzip;q=oops", False),
+    ],
+)
+def test_gzip_negotiation_honours_q_values(header, expected):
+    assert accepts_gzip(header) is expected
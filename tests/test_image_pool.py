@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+def test_palette_estimate_covers_rgba_and_rgb_copies():
+    from app.image_pool import estimated_working_set
+
+    image = Image.new("P", (1000, 1000))
+    pixels = 1000 * 1000
+    # Source, RGBA conversion, split bands, RGB canvas, transposed copy
+    assert estimated_working_set(image) >= pixels * (1 + 4 + 4 + 4 + 4)
+    assert estimated_working_set(Image.new("L", (1000, 1000))) >= pixels * (1 + 4 + 4)
+
+
+def test_cancelled_request_keeps_reservation_until_job_finishes(monkeypatch):
+    import app.image_pool as image_pool
+    from app.image_pool import memory_budget, run_in_image_pool
+
+    # The app's shutdown hook, run by other tests, shuts the shared pool down
+    monkeypatch.setattr(image_pool, "_executor", ThreadPoolExecutor(max_workers=1))
+
+    started, finish = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        finish.wait(5)
+
+    async def scenario():
+        task = asyncio.create_task(run_in_image_pool(Image.new("RGB", (100, 100)), job))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        held_while_running = memory_budget.in_use
+        finish.set()
+        for _ in range(100):
+            if memory_budget.in_use == 0:
+                break
+            await asyncio.sleep(0.01)
+        return held_while_running, memory_budget.in_use
+
+    held_while_running, after = asyncio.run(scenario())
+    assert held_while_running > 0
+    assert after == 0
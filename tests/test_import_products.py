@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_cli_help_runs():
+    result = subprocess.run(
+        [sys.executable, "import_products.py", "--help"],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "--dry-run" in result.stdout
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.monitoring import InflightRequestMiddleware, RuntimeMonitor
+
+
+def _app(content_type: bytes, seen: list, monitor: RuntimeMonitor):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", content_type)],
+            }
+        )
+        # Still streaming: is the request counted as in flight?
+        seen.append(len(monitor.inflight))
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+def _serve(content_type: bytes) -> int:
+    monitor = RuntimeMonitor(interval_ms=100, warn_ms=200)
+    seen = []
+    middleware = InflightRequestMiddleware(
+        _app(content_type, seen, monitor), monitor=monitor
+    )
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/"}
+    asyncio.run(middleware(scope, None, send))
+    assert not monitor.inflight
+    return seen[0]
+
+
+def test_requests_are_tracked_while_served():
+    assert _serve(b"application/json") == 1
+
+
+def test_event_streams_are_not_blamed_for_stalls():
+    assert _serve(b"text/event-stream; charset=utf-8") == 0
+
+
+@pytest.mark.parametrize("path", ["/metrics/pool", "/metrics/runtime"])
+def test_internal_metrics_require_sign_in(db, path):
+    from app.main import app, get_current_user
+
+    with TestClient(app) as client:
+        assert client.get(path).status_code == 401
+
+        app.dependency_overrides[get_current_user] = lambda: None
+        try:
+            response = client.get(path)
+        finally:
+            app.dependency_overrides.pop(get_current_user)
+    assert response.status_code == 200
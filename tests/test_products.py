@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.querystats import assert_max_queries
+
+
+@pytest.fixture
+def products(db):
+    """Ten products, the first five with two images each"""
+    from app.main import Image, Product, User
+
+    user = User(username="admin", email="admin@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    products = [Product(name=f"Pod {index}", price=9.5) for index in range(10)]
+    db.add_all(products)
+    db.flush()
+    for product in products[:5]:
+        for suffix in ("a", "b"):
+            db.add(
+                Image(
+                    filename=f"{product.id}{suffix}.webp",
+                    original_filename="pod.jpg",
+                    file_path=f"uploads/products/{product.id}{suffix}.webp",
+                    file_size=1,
+                    mime_type="image/webp",
+                    entity_type="products",
+                    entity_id=product.id,
+                    uploaded_by=user.id,
+                )
+            )
+    db.commit()
+    return [product.id for product in products]
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    from app.main import app, change_feed
+
+    # assert_max_queries sees every engine, so keep background cleanup out
+    monkeypatch.setattr(change_feed, "start_retention", lambda: None)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_product_list_loads_images_in_one_query(client, products):
+    with assert_max_queries(2):
+        response = client.get("/api/products", params={"limit": 50})
+
+    assert response.status_code == 200
+    images = {item["id"]: item["images"] for item in response.json()}
+    assert len(images) == 10
+    assert [image["filename"] for image in images[products[0]]] == [
+        f"{products[0]}a.webp",
+        f"{products[0]}b.webp",
+    ]
+    assert images[products[9]] == []
+
+
+def test_product_detail_includes_images(client, products):
+    response = client.get(f"/api/products/{products[0]}")
+
+    assert response.status_code == 200
+    assert [image["url"] for image in response.json()["images"]] == [
+        f"/api/images/products/{products[0]}a.webp",
+        f"/api/images/products/{products[0]}b.webp",
+    ]
+    assert client.get(f"/api/products/{products[9]}").json()["images"] == []
+    assert client.get("/api/products/0").status_code == 404
+
+
+def test_updated_product_keeps_its_images(client, products):
+    response = client.put(
+        f"/api/products/{products[0]}", json={"name": "Pod X", "price": 12}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Pod X"
+    assert len(response.json()["images"]) == 2
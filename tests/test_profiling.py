@@ -0,0 +1,52 @@
+import asyncio
+
+from app import profiling
+
+
+def _offloaded_work():
+    return sum(range(1000))
+
+
+def test_threadpool_work_is_profiled():
+    profile = profiling.RequestProfile()
+
+    async def endpoint():
+        token = profiling._active_profile.set(profile)
+        try:
+            return await profiling.run_in_threadpool(_offloaded_work)
+        finally:
+            profiling._active_profile.reset(token)
+
+    assert asyncio.run(endpoint()) == sum(range(1000))
+    assert "_offloaded_work" in profile.report()
+
+
+def test_threadpool_work_is_not_profiled_by_default():
+    assert asyncio.run(profiling.run_in_threadpool(_offloaded_work)) == 499500
+    assert profiling._active_profile.get() is None
+
+
+def test_one_profile_at_a_time():
+    assert profiling._acquire_slot()
+    try:
+        assert not profiling._acquire_slot()
+    finally:
+        profiling._release_slot()
+
+
+def test_a_thread_is_profiled_by_one_request_at_a_time():
+    first, second = profiling.RequestProfile(), profiling.RequestProfile()
+
+    with first.profiling():
+        # e.g. two async endpoints interleaving on the event loop thread
+        with second.profiling():
+            _offloaded_work()
+        _offloaded_work()
+    with second.profiling():
+        _offloaded_work()
+
+    assert "_offloaded_work" in first.report()
+    assert not first.skipped
+    assert second.skipped
+    assert len(second.profilers) == 1
+    assert second.report().startswith("Partial profile")
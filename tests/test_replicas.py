@@ -0,0 +1,89 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.database import Base, ReplicaRouter
+from conftest import TEST_DB_DIR
+
+REPLICA_URL = f"sqlite:///{TEST_DB_DIR}/replica.db"
+UNREACHABLE_URL = f"sqlite:///{TEST_DB_DIR}/missing/replica.db"
+
+
+@pytest.fixture
+def router(db, monkeypatch):
+    """One healthy replica (an empty copy of the schema) in front of the primary"""
+    router = ReplicaRouter([REPLICA_URL])
+    replica = router.replicas[0]
+    Base.metadata.drop_all(bind=replica.engine)
+    Base.metadata.create_all(bind=replica.engine)
+    monkeypatch.setattr(database, "replica_router", router)
+    yield router
+    router.stop_health_checks()
+    replica.engine.dispose()
+
+
+def test_pick_round_robins_over_healthy_replicas():
+    router = ReplicaRouter([REPLICA_URL, REPLICA_URL])
+    first, second = router.replicas
+
+    assert [router.pick() for _ in range(4)] == [first, second, first, second]
+    second.healthy = False
+    assert [router.pick() for _ in range(3)] == [first, first, first]
+    first.healthy = False
+    assert router.pick() is None
+
+
+def test_health_check_marks_unreachable_replicas():
+    router = ReplicaRouter([REPLICA_URL, UNREACHABLE_URL])
+    reachable, unreachable = router.replicas
+
+    for replica in router.replicas:
+        replica.check_health()
+    assert reachable.healthy
+    assert not unreachable.healthy
+    assert [router.pick() for _ in range(3)] == [reachable] * 3
+
+
+def test_reads_fall_back_to_the_primary(router):
+    with database.read_session() as db:
+        assert db.bind is router.replicas[0].engine
+
+    router.replicas[0].healthy = False
+    with database.read_session() as db:
+        assert db.bind is database.engine
+    with database.read_session(use_replica=False) as db:
+        assert db.bind is database.engine
+
+
+def test_client_reads_its_own_writes(router, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "DATABASE_REPLICA_URLS", [REPLICA_URL])
+    with TestClient(main.app) as client:
+        created = client.post("/api/products", json={"name": "Pod", "price": 9.5})
+        assert created.status_code == 200
+        assert database.PRIMARY_STICKY_COOKIE in created.cookies
+
+        # Pinned to the primary, which has the new row
+        product_id = created.json()["id"]
+        assert client.get(f"/api/products/{product_id}").status_code == 200
+
+        # Everyone else reads the replica, which hasn't caught up
+        client.cookies.clear()
+        assert client.get(f"/api/products/{product_id}").status_code == 404
+
+
+def test_health_checks_run_in_the_background():
+    router = ReplicaRouter([UNREACHABLE_URL])
+    router.start_health_checks()
+    try:
+        deadline = time.monotonic() + 5
+        while router.replicas[0].healthy and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not router.replicas[0].healthy
+        assert router.pick() is None
+    finally:
+        router.stop_health_checks()
+    assert router._thread is None
@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+
+def _old_database(tmp_path):
+    """A products table as created before SKUs existed"""
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL,"
+                " description TEXT, price FLOAT NOT NULL, category VARCHAR,"
+                " image_url VARCHAR(500), created_at DATETIME, updated_at DATETIME)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO products (name, price, created_at)"
+                " VALUES ('Pod', 9.5, '2024-01-01 00:00:00')"
+            )
+        )
+    return engine
+
+
+def test_upgrade_schema_adds_sku(tmp_path):
+    from app.main import Base, Product, upgrade_schema
+
+    engine = _old_database(tmp_path)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # idempotent
+
+    indexes = {
+        index["name"]: index for index in inspect(engine).get_indexes("products")
+    }
+    assert indexes["ix_products_sku"]["unique"]
+    with Session(engine) as db:
+        assert db.execute(select(Product.name, Product.sku)).all() == [("Pod", None)]
+
+
+def test_upgrade_schema_backfills_updated_at(tmp_path):
+    from app.main import Base, Product, upgrade_schema
+
+    engine = _old_database(tmp_path)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    assert "ix_products_updated_at" in {
+        index["name"] for index in inspect(engine).get_indexes("products")
+    }
+    with Session(engine) as db:
+        product = db.execute(select(Product)).scalar_one()
+        assert product.updated_at == product.created_at
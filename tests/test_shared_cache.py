@@ -0,0 +1,145 @@
+import asyncio
+import json
+import time
+
+import fakeredis
+import pytest
+import redis
+
+
+def _eventually(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def shared(monkeypatch, server):
+    """app.shared_cache talking to an in-memory Redis"""
+    import app.shared_cache as shared_cache
+
+    monkeypatch.setattr(shared_cache, "_client", fakeredis.FakeRedis(server=server))
+    return shared_cache
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("Redis is down")
+
+        return fail
+
+
+def test_set_get_delete(shared, server):
+    cache = shared.TwoTierCache("test-basic", ttl=30)
+    other_worker = shared.TwoTierCache("test-basic", ttl=30)
+
+    cache.set("a", {"n": 1})
+    assert cache.get("a") == {"n": 1}
+    # A cold L1 is filled from the shared tier
+    other_worker.local.clear()
+    assert other_worker.get("a") == {"n": 1}
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert fakeredis.FakeRedis(server=server).get("vape:test-basic:a") is None
+
+
+def test_falls_back_to_local_tier_when_redis_fails(shared, monkeypatch):
+    cache = shared.TwoTierCache("test-fallback", ttl=30)
+    monkeypatch.setattr(shared, "_client", BrokenRedis())
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("missing", "default") == "default"
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_unreadable_entry_is_a_miss(shared, server):
+    cache = shared.TwoTierCache("test-corrupt", ttl=30)
+    fakeredis.FakeRedis(server=server).set("vape:test-corrupt:a", b"not a pickle")
+    assert cache.get("a", "default") == "default"
+
+
+def test_invalidation_reaches_other_subscribers(shared, server):
+    cache = shared.TwoTierCache("test-invalidate", ttl=30)
+    listener = shared.InvalidationListener()
+    listener.start()
+    # Stands in for another worker's listener
+    other_worker = fakeredis.FakeRedis(server=server).pubsub(
+        ignore_subscribe_messages=True
+    )
+    other_worker.subscribe(shared.INVALIDATION_CHANNEL)
+    try:
+        cache.local.set("a", 1)
+        # Another process invalidates: the listener drops the local copy
+        fakeredis.FakeRedis(server=server).publish(
+            shared.INVALIDATION_CHANNEL,
+            json.dumps({"topic": "test-invalidate", "key": "a"}),
+        )
+        assert _eventually(lambda: cache.local.get("a") is None)
+
+        # This process publishes: the other subscriber hears it
+        shared.publish("test-invalidate", "b")
+        received = []
+
+        def heard_b():
+            message = other_worker.get_message()
+            if message is not None:
+                received.append(json.loads(message["data"]))
+            return {"topic": "test-invalidate", "key": "b"} in received
+
+        assert _eventually(heard_b)
+    finally:
+        listener.stop()
+        other_worker.close()
+
+
+def test_publish_does_not_wait_for_redis(shared, monkeypatch):
+    class SlowRedis:
+        def publish(self, *args):
+            time.sleep(1)
+
+    monkeypatch.setattr(shared, "_client", SlowRedis())
+    started = time.perf_counter()
+    shared.publish("test-slow")
+    assert time.perf_counter() - started < 0.5
+
+
+def test_async_lookups_do_not_block_the_event_loop(shared, monkeypatch):
+    class SlowRedis:
+        def get(self, key):
+            time.sleep(0.5)
+            return None
+
+        def set(self, *args, **kwargs):
+            time.sleep(0.5)
+
+    monkeypatch.setattr(shared, "_client", SlowRedis())
+    cache = shared.TwoTierCache("test-slow-get", ttl=30)
+
+    async def other_request(ticks):
+        while True:
+            await asyncio.sleep(0.01)
+            ticks.append(1)
+
+    async def lookup():
+        ticks = []
+        task = asyncio.create_task(other_request(ticks))
+        assert await cache.get_async("a", "default") == "default"
+        await cache.set_async("a", 1)
+        task.cancel()
+        return len(ticks)
+
+    # A second of Redis latency, during which the loop kept serving others
+    assert asyncio.run(lookup()) > 20
+    assert cache.local.get("a") == 1
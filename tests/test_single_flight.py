@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+from app.database import PRIMARY_STICKY_COOKIE
+from app.single_flight import SingleFlightMiddleware, flight_key
+
+
+class SlowApp:
+    """Counts calls; every response waits until `release` is set"""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"products"})
+
+
+def _scope(query=b"", headers=()):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/products",
+        "query_string": query,
+        "headers": list(headers),
+    }
+
+
+async def _get(middleware, scope=None):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope or _scope(), None, send)
+    headers = dict(messages[0]["headers"])
+    return headers.get(b"x-single-flight"), messages[1]["body"]
+
+
+async def _burst(middleware, app, count):
+    requests = [asyncio.create_task(_get(middleware)) for _ in range(count)]
+    await asyncio.sleep(0.01)
+    app.release.set()
+    return await asyncio.gather(*requests, return_exceptions=True)
+
+
+def test_identical_requests_share_one_handler_call():
+    async def scenario():
+        app = SlowApp()
+        responses = await _burst(SingleFlightMiddleware(app), app, 10)
+        return app, responses
+
+    app, responses = asyncio.run(scenario())
+    assert app.calls == 1
+    assert sorted(role for role, _ in responses) == [b"follower"] * 9 + [b"leader"]
+    assert {body for _, body in responses} == {b"products"}
+
+
+def test_leader_error_reaches_followers():
+    async def scenario():
+        app = SlowApp(error=RuntimeError("database is down"))
+        return app, await _burst(SingleFlightMiddleware(app), app, 3)
+
+    app, responses = asyncio.run(scenario())
+    assert app.calls == 1
+    assert all(isinstance(response, RuntimeError) for response in responses)
+
+
+def test_follower_runs_on_its_own_after_timeout():
+    async def scenario():
+        app = SlowApp()
+        middleware = SingleFlightMiddleware(app, timeout=0.05)
+        leader = asyncio.create_task(_get(middleware))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(_get(middleware))
+        await asyncio.sleep(0.1)
+        # Timed out and called the app itself, which is still held
+        assert app.calls == 2
+        app.release.set()
+        return await leader, await follower
+
+    leader, follower = asyncio.run(scenario())
+    assert leader == (b"leader", b"products")
+    # Served directly, not replayed from the leader
+    assert follower == (None, b"products")
+
+
+def test_query_order_does_not_matter():
+    assert flight_key(_scope(b"skip=0&limit=20")) == flight_key(
+        _scope(b"limit=20&skip=0")
+    )
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        _scope(b"skip=20&limit=20"),
+        _scope(b"skip=0&limit=20", [(b"accept-encoding", b"gzip")]),
+        _scope(
+            b"skip=0&limit=20",
+            [(b"cookie", f"{PRIMARY_STICKY_COOKIE}={time.time() + 60}".encode())],
+        ),
+    ],
+    ids=["query", "accept-encoding", "sticky-primary"],
+)
+def test_requests_that_may_differ_are_not_shared(other):
+    assert flight_key(_scope(b"skip=0&limit=20")) != flight_key(other)
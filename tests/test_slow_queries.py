@@ -0,0 +1,77 @@
+import json
+from threading import BoundedSemaphore
+from types import SimpleNamespace
+
+from app import slow_queries
+
+
+def test_log_directory_is_created_on_first_write(tmp_path, monkeypatch):
+    path = tmp_path / "logs" / "slow.log"
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_LOG", str(path))
+    monkeypatch.setattr(slow_queries, "_file_log_disabled", False)
+    monkeypatch.setattr(slow_queries._file_logger, "handlers", [])
+
+    assert not path.parent.exists()
+    slow_queries._write({"type": "slow_query", "shape": "SELECT 1"})
+
+    slow_queries._file_logger.handlers[0].close()
+    assert json.loads(path.read_text())["shape"] == "SELECT 1"
+
+
+def test_unwritable_log_is_skipped(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_LOG", str(blocker / "slow.log"))
+    monkeypatch.setattr(slow_queries, "_file_log_disabled", False)
+    monkeypatch.setattr(slow_queries._file_logger, "handlers", [])
+
+    slow_queries._write({"type": "slow_query"})
+    assert slow_queries._file_log_disabled
+
+
+def test_explained_shapes_are_bounded(monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN", True)
+    cache = slow_queries.TTLCache(ttl=300, maxsize=3)
+    monkeypatch.setattr(slow_queries, "_explained_shapes", cache)
+    conn = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql", is_async=False)
+    )
+
+    assert slow_queries._should_explain(conn, "SELECT a", False)
+    assert not slow_queries._should_explain(conn, "SELECT a", False)
+    for index in range(10):
+        assert slow_queries._should_explain(conn, f"SELECT {index}", False)
+    assert len(cache) == 3
+
+
+def test_explains_beyond_the_backlog_are_dropped(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(slow_queries, "_explain_slots", BoundedSemaphore(2))
+    monkeypatch.setattr(
+        slow_queries,
+        "_explain_executor",
+        SimpleNamespace(submit=lambda *args: submitted.append(args)),
+    )
+    cache = slow_queries.TTLCache(ttl=300, maxsize=10)
+    monkeypatch.setattr(slow_queries, "_explained_shapes", cache)
+    conn = SimpleNamespace(engine=SimpleNamespace(url="postgresql://db"))
+
+    for index in range(3):
+        shape = f"SELECT {index}"
+        cache.set(shape, True)
+        slow_queries._submit_explain(conn, shape, shape, (), {})
+
+    assert [args[2] for args in submitted] == ["SELECT 0", "SELECT 1"]
+    # The dropped shape can be explained next time it is slow
+    assert cache.get("SELECT 2") is None
+
+
+def test_explain_uses_its_own_single_connection_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(slow_queries, "_explain_engines", {})
+    url = f"sqlite:///{tmp_path}/explain.db"
+
+    engine = slow_queries._explain_engine(url)
+    assert slow_queries._explain_engine(url) is engine
+    assert engine.pool.size() == 1
+    assert engine.pool._max_overflow == 0
+    engine.dispose()
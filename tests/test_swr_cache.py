@@ -0,0 +1,92 @@
+import asyncio
+
+from app.cache import StaleWhileRevalidateCache
+
+SOFT_TTL = 0.05
+HARD_TTL = 0.3
+
+
+class Loader:
+    """Returns 1, 2, 3... per call; calls wait while `gate` is clear"""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self):
+        self.calls += 1
+        value = self.calls
+        await self.gate.wait()
+        return value
+
+
+def _cache(version=None):
+    return StaleWhileRevalidateCache("test-swr", SOFT_TTL, HARD_TTL, version=version)
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache, load = _cache(), Loader()
+        load.gate.clear()
+        readers = [asyncio.create_task(cache.get("key", load)) for _ in range(10)]
+        await asyncio.sleep(0.01)
+        load.gate.set()
+        return load, await asyncio.gather(*readers)
+
+    load, values = asyncio.run(scenario())
+    assert load.calls == 1
+    assert values == [1] * 10
+
+
+def test_stale_burst_triggers_one_background_refresh():
+    async def scenario():
+        cache, load = _cache(), Loader()
+        assert await cache.get("key", load) == 1
+        await asyncio.sleep(SOFT_TTL * 1.5)
+
+        load.gate.clear()
+        # Served the stale value at once, without waiting for the refresh
+        stale = await asyncio.gather(*(cache.get("key", load) for _ in range(20)))
+        refreshes = load.calls - 1
+        load.gate.set()
+        await asyncio.sleep(0.01)
+        return stale, refreshes, await cache.get("key", load)
+
+    stale, refreshes, refreshed = asyncio.run(scenario())
+    assert stale == [1] * 20
+    assert refreshes == 1
+    assert refreshed == 2
+
+
+def test_hard_expired_entries_are_loaded_inline():
+    async def scenario():
+        cache, load = _cache(), Loader()
+        assert await cache.get("key", load) == 1
+        await asyncio.sleep(HARD_TTL * 1.2)
+        return load, await cache.get("key", load)
+
+    load, value = asyncio.run(scenario())
+    # Too old to serve even as stale: the caller waited for the new value
+    assert value == 2
+    assert load.calls == 2
+
+
+def test_version_bump_makes_fresh_entries_stale():
+    version = [0]
+
+    async def scenario():
+        cache, load = _cache(version=lambda: version[0]), Loader()
+        assert await cache.get("key", load) == 1
+        assert await cache.get("key", load) == 1
+        assert load.calls == 1
+
+        version[0] += 1
+        stale = await cache.get("key", load)
+        await asyncio.sleep(0.01)
+        return load, stale, await cache.get("key", load)
+
+    load, stale, refreshed = asyncio.run(scenario())
+    assert stale == 1
+    assert refreshed == 2
+    assert load.calls == 2
@@ -0,0 +1,115 @@
+import base64
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, update
+
+
+@pytest.fixture
+def client(db):
+    from app.main import app
+
+    # One event loop for the whole test, so pooled async connections stay valid
+    with TestClient(app) as client:
+        yield client
+
+
+def _token(state) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not base64!",
+        _token([1]),
+        _token({"v": 2}),
+        _token({"v": 1}),
+        _token({"v": 1, "at": "yesterday"}),
+        _token({"v": 1, "until": "x"}),
+        _token(
+            {"v": 1, "lower": None, "until": "2024-01-01T00:00:00", "cursors": []}
+        ),
+        _token(
+            {
+                "v": 1,
+                "lower": None,
+                "until": "2024-01-01T00:00:00",
+                "cursors": {"products": ["2024-01-01T00:00:00"]},
+            }
+        ),
+    ],
+)
+def test_malformed_token_is_rejected(client, token):
+    assert client.get("/api/sync", params={"since": token}).status_code == 400
+
+
+def test_paged_full_resync_then_delta(client, db):
+    from app.main import Product
+
+    db.add_all(Product(sku=f"SKU-{i}", name=f"Pod {i}", price=1) for i in range(5))
+    db.commit()
+
+    seen, token = [], None
+    while True:
+        params = {"limit": 2, **({"since": token} if token else {})}
+        page = client.get("/api/sync", params=params).json()
+        seen += [product["sku"] for product in page["products"]]
+        token = page["next"]
+        if not page["has_more"]:
+            break
+    assert sorted(seen) == [f"SKU-{i}" for i in range(5)]
+
+    product = db.query(Product).filter_by(sku="SKU-3").one()
+    db.delete(product)
+    db.commit()
+    delta = client.get("/api/sync", params={"since": token}).json()
+    assert not delta["full_resync"]
+    assert [(d["entity_type"], d["entity_id"]) for d in delta["deleted"]] == [
+        ("product", product.id)
+    ]
+
+
+def test_populate_wipe_is_tombstoned(client, db):
+    from app.catalog import catalog_version
+    from app.main import Product
+
+    db.add(Product(sku="OLD", name="Old pod", price=1))
+    db.commit()
+    old_id = db.query(Product.id).scalar()
+    token = client.get("/api/sync").json()["next"]
+    version = catalog_version()
+
+    assert client.post("/api/populate-categories").status_code == 200
+    assert client.post("/api/populate").status_code == 200
+
+    assert catalog_version() > version
+    deleted = client.get("/api/sync", params={"since": token}).json()["deleted"]
+    assert ("product", old_id) in {(d["entity_type"], d["entity_id"]) for d in deleted}
+
+
+def test_delta_includes_rows_from_transactions_open_during_the_last_sync(
+    client, db, monkeypatch
+):
+    if db.bind.dialect.name != "postgresql":
+        pytest.skip("open transactions are only tracked on PostgreSQL")
+    from app.database import engine
+    from app.main import Product
+    from app.routers import sync
+
+    monkeypatch.setattr(sync, "SYNC_OVERLAP_SECONDS", 0)
+    db.add(Product(sku="SLOW", name="Pod", price=1))
+    db.commit()
+    token = client.get("/api/sync").json()["next"]
+
+    with engine.connect() as slow:
+        # Stamped with this transaction's start, committed after the next sync
+        slow.execute(update(Product).values(price=2, updated_at=func.now()))
+        time.sleep(0.05)
+        token = client.get("/api/sync", params={"since": token}).json()["next"]
+        slow.commit()
+
+    delta = client.get("/api/sync", params={"since": token}).json()
+    assert [(p["sku"], p["price"]) for p in delta["products"]] == [("SLOW", 2)]
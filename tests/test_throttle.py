@@ -0,0 +1,18 @@
+import pytest
+
+from app.throttle import TokenBucketLimiter
+
+
+def test_bucket_refills_at_its_rate():
+    limiter = TokenBucketLimiter(capacity=2, per_minute=60)
+
+    assert limiter.acquire("ip") == 0
+    assert limiter.acquire("ip") == 0
+    assert 0 < limiter.acquire("ip") <= 1
+    assert limiter.acquire("other") == 0
+
+
+@pytest.mark.parametrize("capacity, per_minute", [(5, 0), (5, -1), (0, 5)])
+def test_bucket_that_never_allows_a_request_is_rejected(capacity, per_minute):
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(capacity=capacity, per_minute=per_minute)